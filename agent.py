@@ -1,13 +1,21 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
+import asyncio
+import queue
+from typing import Any, AsyncIterator, Dict, Iterator, List, Tuple
 
-from chat.service import Service as ChatService
+from chat.context import ContextBudgetError
+from chat.service import Service as ChatService, UsageSink
 from chat.message import MessageType, m
+from chat.sync import run_sync, submit
 from scope_checker.checker import Checker
-from scope_checker.scope import ScopeEnum
+from scope_checker.scope import ScopeCheck, ScopeEnum
 from brain.plan import Plan
 from brain.reactive import Reactive
+from brain.fused_reactive import FusedReactive
+from brain.strategy import EventSink, emit_message, tool_cache_stats
+
+_STREAM_END = object()
 
 
 class Agent:
@@ -16,38 +24,114 @@ class Agent:
         self,
         model: str = "gpt-4o-mini",
         mode: str = "reactive",
+        speculative_scope: bool = False,
+        llm_backend: str | None = None,
+        on_usage: UsageSink | None = None,
     ):
-        if mode not in ["reactive", "plan"]:
-            raise ValueError("mode must be 'reactive' or 'plan'")
+        if mode not in ["reactive", "plan", "fused"]:
+            raise ValueError("mode must be 'reactive', 'plan' or 'fused'")
         
         self._mode = mode
         self._model = model
-        self._llm = ChatService(model)
-        self._scope = Checker(model)
-        self._brain = Reactive(self._llm) if mode == "reactive" else Plan(self._llm)
+        # None uses BITEXT_LLM_BACKEND; see chat.service for the choices.
+        # on_usage, if given, receives the token usage of every LLM call, including the cached share
+        self._llm = ChatService(model, llm_backend, on_usage)
+        self._scope = Checker(model, llm_backend, on_usage)
+        self._brain = {"reactive": Reactive, "plan": Plan, "fused": FusedReactive}[mode](self._llm)
+        # run the brain's first LLM call alongside the scope check instead of after it
+        self._speculative_scope = speculative_scope
 
     def ask(
         self,
         user_message: str,
         chat_history: List[Dict[str, str]] | None = None,
+        on_event: EventSink | None = None,
+    ) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
+        return run_sync(self.ask_async(user_message, chat_history, on_event))
+
+    def stream(
+        self,
+        user_message: str,
+        chat_history: List[Dict[str, str]] | None = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Blocking generator over the events of ``ask_async``, as they happen.
+
+        The last event is ``{"type": "done", "answer": ..., "history": ...}``,
+        carrying what ``ask`` would have returned.
+        """
+        events: queue.Queue = queue.Queue()
+        future = submit(self.ask_async(user_message, chat_history, events.put))
+        future.add_done_callback(lambda _: events.put(_STREAM_END))
+        try:
+            while (event := events.get()) is not _STREAM_END:
+                yield event
+            answer, history = future.result()
+            yield {"type": "done", "answer": answer, "history": history}
+        finally:
+            future.cancel()
+
+    async def astream(
+        self,
+        user_message: str,
+        chat_history: List[Dict[str, str]] | None = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Async counterpart of ``stream``."""
+        events: asyncio.Queue = asyncio.Queue()
+        task = asyncio.ensure_future(self.ask_async(user_message, chat_history, events.put_nowait))
+        task.add_done_callback(lambda _: events.put_nowait(_STREAM_END))
+        try:
+            while (event := await events.get()) is not _STREAM_END:
+                yield event
+            answer, history = task.result()
+            yield {"type": "done", "answer": answer, "history": history}
+        finally:
+            task.cancel()
+
+    async def ask_async(
+        self,
+        user_message: str,
+        chat_history: List[Dict[str, str]] | None = None,
+        on_event: EventSink | None = None,
     ) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
+        """Answer ``user_message``; returns the answer and the updated history.
+
+        ``on_event``, if given, is called with ``{"type": "message", "message": ...}``
+        for every message as it is added to the history, and with
+        ``{"type": "answer_delta", "content": ...}`` (the answer text so far)
+        while the final answer streams in.
+        """
         
         print("---<THINKING>---")
 
         history = self._initialize_history(user_message, chat_history)
         
-        scope_check = self._scope.check(user_message, history)
+        first_step = None
+        held_events = None
+        if self._speculative_scope:
+            # Bet on the check passing: the speculative call sees the history an
+            # in-scope check would produce, and is thrown away if the bet loses
+            assumed = ScopeCheck(scope=ScopeEnum.IN_SCOPE, reasoning="")
+            held_events = _HeldEvents(on_event) if on_event is not None else None
+            first_step = asyncio.ensure_future(
+                self._brain.afirst_step(history + [self._scope_message(assumed)], on_event=held_events)
+            )
+
+        try:
+            scope_check = await self._scope.acheck(user_message, history)
+        except ContextBudgetError as error:
+            _discard(first_step)
+            return self._over_budget(history, error, on_event)
+        except BaseException:
+            _discard(first_step)
+            raise
         print(f"Checking if the question is in scope: {scope_check.scope.value}")
         print(f"   {scope_check.reasoning}")
 
-        history.append(m(
-            role="assistant",
-            content=f"🔍 Scope Check: {scope_check.scope.value}",
-            reasoning=scope_check.reasoning,
-            message_type=MessageType.THINKING
-        ))
+        history.append(self._scope_message(scope_check))
+        emit_message(on_event, history[-1])
 
         if scope_check.scope == ScopeEnum.OUT_OF_SCOPE:
+            _discard(first_step)
             scope_msg = m(
                 role="assistant", 
                 reasoning=scope_check.reasoning,
@@ -55,11 +139,17 @@ class Agent:
                 message_type=MessageType.USER_FACING
             )
             history.append(scope_msg)
+            emit_message(on_event, scope_msg)
 
             print("---</THINKING>---")
             return scope_msg, history
         
-        answer, tool_msgs = self._brain.think(history)
+        if held_events is not None:
+            held_events.release()
+        try:
+            answer, tool_msgs = await self._brain.athink(history, first_step=first_step, on_event=on_event)
+        except ContextBudgetError as error:
+            return self._over_budget(history, error, on_event)
 
         history.extend(tool_msgs)
         history.append(m(
@@ -68,23 +158,92 @@ class Agent:
             reasoning=answer["reasoning"],
             message_type=MessageType.USER_FACING
         ))
+        emit_message(on_event, history[-1])
 
+        stats = tool_cache_stats()
+        print(f"   🗄️  Tool cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['entries']} entries, {stats['bytes'] / 2**10:.1f} KB")
         print("---</THINKING>---\n")
         
         return answer, history
 
+    @staticmethod
+    def _over_budget(
+        history: List[Dict[str, str]],
+        error: ContextBudgetError,
+        on_event: EventSink | None,
+    ) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
+        """Answer with an explanation instead of failing when the prompt cannot fit the token ceiling."""
+        print(f"   ⚠️  {error}")
+        budget_msg = m(
+            role="assistant",
+            reasoning=str(error),
+            content="This conversation has grown too long for me to answer within my context budget. "
+                    "Please start a new chat or ask a narrower question.",
+            message_type=MessageType.USER_FACING
+        )
+        history.append(budget_msg)
+        emit_message(on_event, budget_msg)
+
+        print("---</THINKING>---")
+        return budget_msg, history
+
+    @staticmethod
+    def _scope_message(scope_check: ScopeCheck) -> Dict[str, str]:
+        return m(
+            role="assistant",
+            content=f"🔍 Scope Check: {scope_check.scope.value}",
+            reasoning=scope_check.reasoning,
+            message_type=MessageType.THINKING
+        )
+
     def _initialize_history(
         self,
         user_message: str,
         chat_history: List[Dict[str, str]] | None = None,
     ) -> List[Dict[str, str]]:
-        if chat_history:
-            history = chat_history[:]
-        else:
-            history = [m(
+        history = chat_history[:] if chat_history else []
+        # callers may pass only the visible turns (the app does); every call still needs
+        # the system prompt first, as the tool docs and the shared cacheable prefix
+        if not history or history[0]["role"] != "system":
+            history.insert(0, m(
                 role="system",
                 content=self._brain.get_system_prompt(),
                 message_type=MessageType.SYSTEM
-            )]
+            ))
         history.append(m(role="user", content=user_message, message_type=MessageType.USER_FACING))
-        return history
\ No newline at end of file
+        return history
+
+
+class _HeldEvents:
+    """Holds a speculative step's answer until the bet it was made on is won.
+
+    Until ``release``, only the latest event is kept: every answer delta
+    carries the whole answer so far. After it, events pass straight through.
+    """
+
+    def __init__(self, on_event: EventSink) -> None:
+        self._on_event = on_event
+        self._latest: Dict[str, Any] | None = None
+        self._released = False
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        if self._released:
+            self._on_event(event)
+        else:
+            self._latest = event
+
+    def release(self) -> None:
+        self._released = True
+        if self._latest is not None:
+            self._on_event(self._latest)
+            self._latest = None
+
+
+def _discard(task: asyncio.Future | None) -> None:
+    """Cancel speculative work whose result is no longer wanted."""
+    if task is None:
+        return
+    task.cancel()
+    # retrieve a failure that beat the cancellation, so it is not reported as unhandled
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
@@ -1,15 +1,16 @@
 import os
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
+from dotenv import load_dotenv
+
+# load before importing the agent: the datastore reads its settings at import time
+load_dotenv()
+
 import streamlit as st
 from agent import Agent
 from chat.message import MessageType, Message
 import time
 
-from dotenv import load_dotenv
-
-load_dotenv()
-
 
 def _format_duration(seconds: float) -> str:
     """Return a human friendly duration string."""
@@ -68,6 +69,18 @@ def display_thinking_messages(messages, duration: float | None = None):
                             {msg['content']}
                             """)
 
+def display_live_message(status, message):
+    """Show a thinking step or tool event in the live status box while the agent works."""
+    if message["message_type"] == MessageType.THINKING:
+        status.update(label=f"🤔  {message['content'][:80]}")
+        status.write("🤔  " + message["content"])
+    elif message["message_type"] == MessageType.TOOL_CALL:
+        status.write(f"🔧  {message['content']}")
+        for tool_call in message.get("tool_calls") or []:
+            status.markdown(f"> 🛠️  Calling {tool_call['function']['name']} tool with args: {tool_call['function']['arguments']}")
+    elif message["message_type"] == MessageType.TOOL_RESULT:
+        status.markdown(f"> ✅  Tool Result: {message['content'][:300]}")
+
 def display_message(message):
     """Display a user-facing message in the chat."""
     if message["role"] == "system":
@@ -88,11 +101,11 @@ def main():
         st.subheader("Agent Mode")
         mode = st.radio(
             "Select agent mode:",
-            ["reactive", "plan"],
+            ["reactive", "plan", "fused"],
             key="agent_mode"
         )
         st.caption("⚠️ Switching modes will reset the conversation")
-        st.caption("💡 reactive: step-by-step thinking | plan: creates a plan first")
+        st.caption("💡 reactive: step-by-step thinking | plan: creates a plan first | fused: thinks and acts in one call per step")
     
     # Initialize the agent and chat_turns on mode change or first run
     if 'agent' not in st.session_state or st.session_state.get('current_mode') != mode:
@@ -131,24 +144,34 @@ def main():
         if turn["assistant"]:
             display_message(turn["assistant"])
     
-    # If a new question was just added, process the agent response and update the last turn
+    # If a new question was just added, stream the agent response and update the last turn
     if new_question:
-        with st.spinner('The agent is deep in thoughts... and possibly snacking. Hang tight!'):
-            # Get agent's response (returns full updated history)
-            all_prev_msgs = [msg for turn in st.session_state.chat_turns[:-1] for msg in [turn["user"]] + turn.get("thinking", []) + ([turn["assistant"]] if turn["assistant"] else [])]
-            start_time = time.monotonic()
-            response, updated_history = st.session_state.agent.ask(prompt, all_prev_msgs)
-            duration = time.monotonic() - start_time
-            # Extract new thinking messages and assistant answer
-            user_indices = [i for i, msg in enumerate(updated_history) if msg["role"] == "user"]
-            last_user_idx = user_indices[-1] if user_indices else 0
-            thinking_msgs = updated_history[last_user_idx+1:-1]
-            assistant_msg = updated_history[-1]
-            # Update the last turn
-            st.session_state.chat_turns[-1]["thinking"] = thinking_msgs
-            st.session_state.chat_turns[-1]["assistant"] = assistant_msg
-            st.session_state.chat_turns[-1]["duration"] = duration
-            st.rerun()
+        # Get agent's response (the final event carries the full updated history)
+        all_prev_msgs = [msg for turn in st.session_state.chat_turns[:-1] for msg in [turn["user"]] + turn.get("thinking", []) + ([turn["assistant"]] if turn["assistant"] else [])]
+        start_time = time.monotonic()
+        status = st.status("The agent is deep in thoughts... and possibly snacking. Hang tight!")
+        with st.chat_message("assistant"):
+            answer_placeholder = st.empty()
+        for event in st.session_state.agent.stream(prompt, all_prev_msgs):
+            if event["type"] == "message" and event["message"]["message_type"] == MessageType.USER_FACING:
+                answer_placeholder.write(event["message"]["content"])
+            elif event["type"] == "message":
+                display_live_message(status, event["message"])
+            elif event["type"] == "answer_delta":
+                answer_placeholder.write(event["content"])
+            elif event["type"] == "done":
+                updated_history = event["history"]
+        duration = time.monotonic() - start_time
+        # Extract new thinking messages and assistant answer
+        user_indices = [i for i, msg in enumerate(updated_history) if msg["role"] == "user"]
+        last_user_idx = user_indices[-1] if user_indices else 0
+        thinking_msgs = updated_history[last_user_idx+1:-1]
+        assistant_msg = updated_history[-1]
+        # Update the last turn
+        st.session_state.chat_turns[-1]["thinking"] = thinking_msgs
+        st.session_state.chat_turns[-1]["assistant"] = assistant_msg
+        st.session_state.chat_turns[-1]["duration"] = duration
+        st.rerun()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from bitext import storage
+
+
+_IVF_VERSION = 1
+_ASSIGN_BLOCK = 65536
+_ARRAYS = ("centroids", "offsets", "ids", "vectors")
+
+
+class IVFIndex:
+    """Approximate cosine search with an inverted-file (IVF) index.
+
+    Rows are bucketed by their nearest k-means centroid and stored contiguously
+    per bucket. A query scores the centroids, then scans only the ``nprobe``
+    closest buckets exactly, so its cost is roughly ``nprobe / nlist`` of an
+    exact scan. ``nprobe`` is the recall/latency knob: raise it for recall,
+    lower it for speed, ``nprobe == nlist`` is exact search.
+
+    Expects L2-normalized rows, like ``_ExactIndex`` in ``bitext.datastore``.
+    """
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        nprobe: int = 16,
+    ) -> None:
+        self.centroids = centroids
+        self.offsets = offsets
+        self.ids = ids
+        self.vectors = vectors
+        self.nprobe = nprobe
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        nlist: int | None = None,
+        nprobe: int = 16,
+        n_iter: int = 10,
+        seed: int = 0,
+    ) -> "IVFIndex":
+        """Train the coarse quantizer on a sample and bucket every row."""
+        rng = np.random.default_rng(seed)
+        n_rows = len(embeddings)
+        if nlist is None:
+            nlist = max(1, int(4 * np.sqrt(n_rows)))
+        nlist = min(nlist, n_rows)
+
+        sample_size = min(n_rows, nlist * 64)
+        sample = np.asarray(embeddings[np.sort(rng.choice(n_rows, sample_size, replace=False))], dtype=np.float32)
+        centroids = _train_centroids(sample, nlist, n_iter, rng)
+
+        assign = _assign(embeddings, centroids)
+        ids = np.argsort(assign, kind="stable")
+        offsets = np.zeros(nlist + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(assign, minlength=nlist))
+        vectors = np.asarray(embeddings[ids], dtype=np.float32)
+
+        return cls(centroids, offsets, ids, vectors, nprobe=nprobe)
+
+    def search(self, queries: np.ndarray, k: int, nprobe: int | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the row positions and cosine scores of the ``k`` best matches.
+
+        Same contract as ``_ExactIndex.search``. When the probed buckets hold
+        fewer than ``k`` rows, a single query returns fewer results and a batch
+        is padded with position ``-1`` and score ``-inf``.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        single = queries.ndim == 1
+        queries = np.atleast_2d(queries)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+
+        coarse = queries @ self.centroids.T
+        probes = np.argpartition(-coarse, nprobe - 1, axis=1)[:, :nprobe]
+
+        out_idx = np.full((len(queries), k), -1, dtype=np.int64)
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for qi, (query, lists) in enumerate(zip(queries, probes)):
+            pos = np.concatenate([np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists])
+            scores = self.vectors[pos] @ query
+            kk = min(k, len(pos))
+            if kk == 0:
+                continue
+            top = np.argpartition(-scores, kk - 1)[:kk]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            out_idx[qi, :kk] = self.ids[pos[top]]
+            out_scores[qi, :kk] = scores[top]
+
+        if single:
+            found = out_idx[0] >= 0
+            return out_idx[0][found], out_scores[0][found]
+        return out_idx, out_scores
+
+    def save(self, directory: Path, source: Dict[str, Any]) -> None:
+        """Persist the index; ``source`` identifies the embeddings it was built from."""
+        storage.save_arrays(
+            directory,
+            {name: getattr(self, name) for name in _ARRAYS},
+            self._manifest(source, self.nlist),
+        )
+
+    @classmethod
+    def load(cls, directory: Path, source: Dict[str, Any], nlist: int | None, nprobe: int = 16) -> "IVFIndex | None":
+        """Memory-map a saved index, or return None if it is missing or stale."""
+        manifest = storage.load_manifest(directory)
+        if manifest is None or manifest["version"] != _IVF_VERSION or manifest["source"] != source:
+            return None
+        if nlist is not None and manifest["nlist"] != nlist:
+            return None
+        return cls(nprobe=nprobe, **storage.load_arrays(directory, _ARRAYS))
+
+    @staticmethod
+    def _manifest(source: Dict[str, Any], nlist: int) -> Dict[str, Any]:
+        return {"version": _IVF_VERSION, "nlist": nlist, "source": source}
+
+
+def _assign(embeddings: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for every row, computed in blocks."""
+    assign = np.empty(len(embeddings), dtype=np.int64)
+    for start in range(0, len(embeddings), _ASSIGN_BLOCK):
+        block = np.asarray(embeddings[start:start + _ASSIGN_BLOCK], dtype=np.float32)
+        assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assign
+
+
+def _train_centroids(sample: np.ndarray, nlist: int, n_iter: int, rng: np.random.Generator) -> np.ndarray:
+    """Spherical k-means: centroids are kept unit-length so scoring stays a dot product."""
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(n_iter):
+        assign = _assign(sample, centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=nlist)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        filled = counts > 0
+
+        centroids[filled] = np.add.reduceat(sample[order], starts[filled], axis=0)
+        # reseed empty buckets from random sample rows
+        centroids[~filled] = sample[rng.choice(len(sample), int((~filled).sum()))]
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids
@@ -0,0 +1,77 @@
+"""Recall-vs-latency benchmark of the IVF index against exact search.
+
+Run from the project root:
+
+    python -m bitext.ann_benchmark --rows 1000000 --queries 200 --k 10
+
+``--rows`` above the dataset size synthesizes extra rows by jittering real
+embeddings, which keeps the cluster structure of the data while simulating a
+larger corpus.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from bitext.ann import IVFIndex
+from bitext.datastore import _ExactIndex, _store
+
+
+def _jitter(base: np.ndarray, n_rows: int, noise: float, rng: np.random.Generator) -> np.ndarray:
+    picked = np.asarray(base[rng.integers(0, len(base), n_rows)], dtype=np.float32)
+    picked += rng.normal(0, noise / np.sqrt(base.shape[1]), picked.shape).astype(np.float32)
+    return picked / np.linalg.norm(picked, axis=1, keepdims=True)
+
+
+def _time_queries(index, queries: np.ndarray, k: int, **kwargs):
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        idx, _ = index.search(query, k, **kwargs)
+        latencies.append(time.perf_counter() - start)
+        results.append(idx)
+    return results, np.array(latencies) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=None, help="corpus size (default: the dataset itself)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None, help="IVF buckets (default: 4 * sqrt(rows))")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    embeddings = np.asarray(_store.embeddings, dtype=np.float32)
+    if args.rows is not None and args.rows > len(embeddings):
+        extra = _jitter(embeddings, args.rows - len(embeddings), 0.3, rng)
+        embeddings = np.concatenate([embeddings, extra])
+    queries = _jitter(embeddings, args.queries, 0.3, rng)
+
+    print(f"corpus: {len(embeddings):,} rows x {embeddings.shape[1]} dims, {len(queries)} queries, k={args.k}")
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(embeddings, nlist=args.nlist)
+    print(f"IVF build: {time.perf_counter() - start:.1f}s, nlist={ivf.nlist}\n")
+
+    exact_results, exact_ms = _time_queries(_ExactIndex(embeddings), queries, args.k)
+    print(f"{'index':<16}{'recall@k':>10}{'mean ms':>10}{'p95 ms':>10}")
+    print(f"{'exact':<16}{1.0:>10.3f}{exact_ms.mean():>10.2f}{np.percentile(exact_ms, 95):>10.2f}")
+
+    nprobe = 1
+    while nprobe <= ivf.nlist:
+        ivf_results, ivf_ms = _time_queries(ivf, queries, args.k, nprobe=nprobe)
+        recall = np.mean([
+            len(np.intersect1d(found, expected)) / len(expected)
+            for found, expected in zip(ivf_results, exact_results)
+        ])
+        label = f"ivf nprobe={nprobe}"
+        print(f"{label:<16}{recall:>10.3f}{ivf_ms.mean():>10.2f}{np.percentile(ivf_ms, 95):>10.2f}")
+        nprobe *= 2
+
+
+if __name__ == "__main__":
+    main()
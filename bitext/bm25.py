@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import CountVectorizer
+
+from bitext import storage
+
+
+_BM25_VERSION = 1
+_TOKEN_PATTERN = r"(?u)\b\w+\b"
+# the CSC components of the weight matrix, one .npy file each
+_ARRAYS = ("data", "indices", "indptr")
+
+
+class BM25Index:
+    """Okapi BM25 lexical search over a precomputed sparse weight matrix.
+
+    Each nonzero of the ``(rows, terms)`` matrix already holds the full BM25
+    contribution of that term to that row (idf times the saturated,
+    length-normalized term frequency), so scoring a query is just summing
+    the matrix columns of its terms.
+    """
+
+    def __init__(self, weights: sparse.csc_matrix, vocabulary: Dict[str, int]) -> None:
+        self.weights = weights
+        self.vocabulary = vocabulary
+        self._token_re = re.compile(_TOKEN_PATTERN)
+
+    @classmethod
+    def build(cls, texts: List[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        vectorizer = CountVectorizer(lowercase=True, token_pattern=_TOKEN_PATTERN, dtype=np.float32)
+        tf = vectorizer.fit_transform(texts).tocsr()
+
+        n_rows = tf.shape[0]
+        doc_len = np.asarray(tf.sum(axis=1)).ravel()
+        doc_freq = np.bincount(tf.indices, minlength=tf.shape[1])
+        idf = np.log1p((n_rows - doc_freq + 0.5) / (doc_freq + 0.5))
+
+        row_of = np.repeat(np.arange(n_rows), np.diff(tf.indptr))
+        norm = k1 * (1 - b + b * doc_len[row_of] / max(doc_len.mean(), 1e-12))
+        data = idf[tf.indices] * tf.data * (k1 + 1) / (tf.data + norm)
+
+        weights = sparse.csr_matrix((data.astype(np.float32), tf.indices, tf.indptr), shape=tf.shape).tocsc()
+        vocabulary = {term: int(i) for term, i in vectorizer.vocabulary_.items()}
+        return cls(weights, vocabulary)
+
+    def search(self, text: str, k: int, rows: np.ndarray | None = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the row positions and BM25 scores of the ``k`` best matches.
+
+        Only rows sharing at least one term with the query are returned, so
+        there may be fewer than ``k``. ``rows`` restricts the candidates.
+        """
+        terms = sorted({self.vocabulary[t] for t in self._token_re.findall(text.lower()) if t in self.vocabulary})
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        scores = np.asarray(self.weights[:, terms].sum(axis=1)).ravel()
+        positions = np.arange(len(scores)) if rows is None else rows
+        scores = scores[positions]
+        matched = np.flatnonzero(scores > 0)
+
+        kk = min(k, len(matched))
+        if kk <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = matched[np.argpartition(-scores[matched], kk - 1)[:kk]]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return positions[top], scores[top]
+
+    def save(self, directory: Path, source: Dict[str, Any]) -> None:
+        """Persist the index; ``source`` identifies the text it was built from."""
+        storage.save_arrays(
+            directory,
+            {name: getattr(self.weights, name) for name in _ARRAYS},
+            self._manifest(source, self.weights.shape),
+            json_files={"vocabulary": self.vocabulary},
+        )
+
+    @classmethod
+    def load(cls, directory: Path, source: Dict[str, Any]) -> "BM25Index | None":
+        """Memory-map a saved index, or return None if it is missing or stale."""
+        manifest = storage.load_manifest(directory)
+        if manifest is None or manifest["version"] != _BM25_VERSION or manifest["source"] != source:
+            return None
+
+        arrays = storage.load_arrays(directory, _ARRAYS)
+        weights = sparse.csc_matrix(tuple(arrays[name] for name in _ARRAYS), shape=tuple(manifest["shape"]), copy=False)
+        vocabulary = storage.read_json(directory / "vocabulary.json")
+        return cls(weights, vocabulary)
+
+    @staticmethod
+    def _manifest(source: Dict[str, Any], shape: Tuple[int, int]) -> Dict[str, Any]:
+        return {"version": _BM25_VERSION, "shape": list(shape), "source": source}
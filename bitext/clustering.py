@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+from scipy.cluster.hierarchy import fcluster, linkage
+from sklearn.cluster import KMeans, MiniBatchKMeans
+
+from bitext import storage
+
+
+_TREE_VERSION = 1
+# "auto" switches from full-batch to mini-batch k-means above this many rows
+_MINIBATCH_MIN_ROWS = 10000
+_MINIBATCH_SIZE = 4096
+# leaves of the cluster tree; any n up to this is answered by cutting the tree
+_TREE_LEAVES = 256
+
+BACKENDS = ("auto", "kmeans", "minibatch", "tree")
+
+
+def cluster(
+    embeddings: np.ndarray,
+    n: int,
+    backend: str = "auto",
+    max_iter: int = 300,
+    time_budget: float | None = None,
+    tree_file: Path | None = None,
+    tree_source: Dict[str, Any] | None = None,
+    seed: int = 0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Partition ``embeddings`` into ``n`` clusters; returns labels and cluster centers.
+
+    ``kmeans`` is full-batch k-means, ``minibatch`` streams fixed-size batches
+    so its cost per iteration does not grow with the slice, and ``auto`` picks
+    between the two by slice size. ``tree`` cuts a hierarchical cluster tree
+    that is built once per slice and persisted to ``tree_file`` (if given), so
+    any ``n`` after the first costs only the cut. ``max_iter`` bounds the
+    (mini-batch) iterations and ``time_budget`` the seconds spent in mini-batch
+    training; full-batch k-means only honours ``max_iter``.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown clustering backend: {backend!r}. Use one of {list(BACKENDS)}")
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    n = min(n, len(embeddings))
+
+    if backend == "auto":
+        backend = "kmeans" if len(embeddings) <= _MINIBATCH_MIN_ROWS else "minibatch"
+
+    if backend == "kmeans":
+        model = KMeans(n_clusters=n, random_state=seed, n_init="auto", max_iter=max_iter)
+        labels = model.fit_predict(embeddings)
+        return labels, model.cluster_centers_.astype(np.float32)
+
+    if backend == "minibatch":
+        return _minibatch(embeddings, n, max_iter, time_budget, seed)
+
+    if tree_file is None:
+        return ClusterTree.build(embeddings, max_iter=max_iter, time_budget=time_budget, seed=seed).cut(n)
+
+    tree = ClusterTree.load(tree_file, tree_source)
+    if tree is None:
+        with storage.build_lock(tree_file):
+            tree = ClusterTree.load(tree_file, tree_source)
+            if tree is None:
+                tree = ClusterTree.build(embeddings, max_iter=max_iter, time_budget=time_budget, seed=seed)
+                tree.save(tree_file, tree_source)
+    return tree.cut(n)
+
+
+class ClusterTree:
+    """Agglomerative (Ward) cluster tree over mini-batch k-means leaves.
+
+    Linking every row is quadratic, so rows are first bucketed into at most
+    ``_TREE_LEAVES`` leaves and only the leaf centroids are linked. Cutting
+    the tree at ``n`` clusters then only relabels leaves.
+    """
+
+    def __init__(self, leaf_labels: np.ndarray, leaf_centroids: np.ndarray, leaf_sizes: np.ndarray, links: np.ndarray) -> None:
+        self.leaf_labels = leaf_labels
+        self.leaf_centroids = leaf_centroids
+        self.leaf_sizes = leaf_sizes
+        self.links = links
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        n_leaves: int = _TREE_LEAVES,
+        max_iter: int = 300,
+        time_budget: float | None = None,
+        seed: int = 0,
+    ) -> "ClusterTree":
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(embeddings) <= n_leaves:
+            leaf_labels = np.arange(len(embeddings))
+            leaf_centroids = embeddings.copy()
+        else:
+            leaf_labels, leaf_centroids = _minibatch(embeddings, n_leaves, max_iter, time_budget, seed)
+
+        leaf_sizes = np.bincount(leaf_labels, minlength=len(leaf_centroids))
+        # leaves no row was assigned to would only add spurious branches
+        kept = np.flatnonzero(leaf_sizes)
+        remap = np.full(len(leaf_centroids), -1, dtype=np.int64)
+        remap[kept] = np.arange(len(kept))
+        leaf_labels, leaf_centroids, leaf_sizes = remap[leaf_labels], leaf_centroids[kept], leaf_sizes[kept]
+
+        links = linkage(leaf_centroids, method="ward") if len(kept) > 1 else np.empty((0, 4))
+        return cls(leaf_labels, leaf_centroids, leaf_sizes, links)
+
+    def cut(self, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Labels and size-weighted centers of (at most) ``n`` clusters."""
+        n_leaves = len(self.leaf_centroids)
+        if n_leaves == 1:
+            groups = np.zeros(1, dtype=np.int64)
+        else:
+            groups = fcluster(self.links, t=min(n, n_leaves), criterion="maxclust") - 1
+
+        n_groups = groups.max() + 1
+        sizes = np.bincount(groups, weights=self.leaf_sizes, minlength=n_groups)
+        centers = np.zeros((n_groups, self.leaf_centroids.shape[1]), dtype=np.float32)
+        np.add.at(centers, groups, self.leaf_centroids * self.leaf_sizes[:, None])
+        centers /= sizes[:, None]
+        return groups[self.leaf_labels], centers
+
+    def save(self, path: Path, source: Dict[str, Any] | None) -> None:
+        """Persist the tree; ``source`` identifies the slice it was built from."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # through a file object, as np.savez would append ".npz" to the temp name
+        with storage.replacing(path) as tmp_file, open(tmp_file, "wb") as f:
+            np.savez(
+                f,
+                leaf_labels=self.leaf_labels,
+                leaf_centroids=self.leaf_centroids,
+                leaf_sizes=self.leaf_sizes,
+                links=self.links,
+                manifest=np.array(json.dumps({"version": _TREE_VERSION, "source": source})),
+            )
+
+    @classmethod
+    def load(cls, path: Path, source: Dict[str, Any] | None) -> "ClusterTree | None":
+        """Load a saved tree, or return None if it is missing or stale."""
+        if not path.exists():
+            return None
+        with np.load(path) as saved:
+            if json.loads(str(saved["manifest"])) != {"version": _TREE_VERSION, "source": source}:
+                return None
+            return cls(**{name: saved[name] for name in ("leaf_labels", "leaf_centroids", "leaf_sizes", "links")})
+
+
+def _minibatch(
+    embeddings: np.ndarray,
+    n: int,
+    max_iter: int,
+    time_budget: float | None,
+    seed: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Mini-batch k-means, stopped after ``max_iter`` passes or ``time_budget`` seconds."""
+    batch_size = max(_MINIBATCH_SIZE, 3 * n)
+    model = MiniBatchKMeans(n_clusters=n, batch_size=batch_size, random_state=seed, n_init="auto", max_iter=max_iter)
+    if time_budget is None:
+        model.fit(embeddings)
+    else:
+        rng = np.random.default_rng(seed)
+        deadline = time.perf_counter() + time_budget
+        for _ in range(max_iter):
+            order = rng.permutation(len(embeddings))
+            for start in range(0, len(order), batch_size):
+                model.partial_fit(embeddings[np.sort(order[start:start + batch_size])])
+                if time.perf_counter() > deadline:
+                    break
+            if time.perf_counter() > deadline:
+                break
+    return model.predict(embeddings), model.cluster_centers_.astype(np.float32)
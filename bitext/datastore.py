@@ -1,34 +1,111 @@
 from __future__ import annotations
 
+import hashlib
+import os
 from pathlib import Path
 from functools import lru_cache
 from typing import List, Tuple, Dict, Any
 
-import joblib
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from datasets import load_dataset
 from sentence_transformers import SentenceTransformer
-from sklearn.neighbors import NearestNeighbors
 import numpy as np
 
+from bitext import storage
+from bitext.ann import IVFIndex
+from bitext.bm25 import BM25Index
+from bitext.trigram import TrigramIndex
+
 
 _MODEL_NAME = "all-MiniLM-L6-v2"
 _CACHE_DIR = Path(".bitext_cache"); _CACHE_DIR.mkdir(exist_ok=True)
-_EMB_FILE = _CACHE_DIR / "embeddings.pkl"
-_IDX_FILE = _CACHE_DIR / "nn_index.pkl"
+_DATASET_NAME = "bitext/Bitext-customer-support-llm-chatbot-training-dataset"
+_SNAPSHOT_VERSION = 1
+_SNAPSHOT_FILE = _CACHE_DIR / f"dataset_v{_SNAPSHOT_VERSION}.arrow"
+_FEATURES_VERSION = 1
+_FEATURES_FILE = _CACHE_DIR / f"features_v{_FEATURES_VERSION}.arrow"
+_TRIGRAM_DIR = _CACHE_DIR / "trigrams"
+_BM25_DIR = _CACHE_DIR / "bm25"
+_VECTOR_STORE_VERSION = 3
+_VECTOR_DIR = _CACHE_DIR / f"vectors_v{_VECTOR_STORE_VERSION}"
+# numpy has no BLAS kernels for float16, so a float16 matrix turns every query
+# into a slow elementwise loop; float32 keeps the matvec on BLAS
+_VECTOR_DTYPE = np.float32
+_MANIFEST_FILE = _VECTOR_DIR / "manifest.json"
+# "exact" scans every row; "ivf" only scans the nprobe closest of nlist buckets,
+# trading a little recall for sublinear queries on very large corpora
+_SEARCH_BACKEND = os.environ.get("BITEXT_SEARCH_BACKEND", "exact")
+_IVF_DIR = _CACHE_DIR / "ivf"
+_IVF_NLIST = int(os.environ["BITEXT_IVF_NLIST"]) if "BITEXT_IVF_NLIST" in os.environ else None
+_IVF_NPROBE = int(os.environ.get("BITEXT_IVF_NPROBE", "16"))
 _INSTRUCTION_COL = "instruction"
 _RESPONSE_COL = "response"
 _CATEGORY_COL = "category"
 _INTENT_COL = "intent"
 _FLAGS_COL = "flags"
+_CATEGORICAL_COLS = [_CATEGORY_COL, _INTENT_COL, _FLAGS_COL]
+_TEXT_COLS = [_INSTRUCTION_COL, _RESPONSE_COL]
+# "combined" embeds instruction + " " + response; the others embed a single column
+_COMBINED_FIELD = "combined"
+_EMBEDDING_FIELDS = [_COMBINED_FIELD, _INSTRUCTION_COL, _RESPONSE_COL]
+
+
+class _ExactIndex:
+    """Exact top-k cosine search over an L2-normalized embedding matrix.
+
+    With unit-length rows cosine similarity is a plain dot product, so a query
+    costs one matrix-vector product plus an ``argpartition`` over the scores.
+    """
+
+    def __init__(self, embeddings: np.ndarray) -> None:
+        self.embeddings = embeddings
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the row positions and cosine scores of the ``k`` best matches.
+
+        ``queries`` may be a single vector or a ``(n_queries, dim)`` batch; the
+        results are 1-d or 2-d accordingly, best match first.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        single = queries.ndim == 1
+        queries = np.atleast_2d(queries)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        scores = queries @ self.embeddings.T
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            idx = np.empty((len(queries), 0), dtype=np.int64)
+            top_scores = np.empty((len(queries), 0), dtype=np.float32)
+        else:
+            idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, idx, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            idx = np.take_along_axis(idx, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        if single:
+            return idx[0], top_scores[0]
+        return idx, top_scores
 
 
 class _Store:
 
     def __init__(self) -> None:
-        self.df = self._load_df()
+        self.df, self.fingerprint = self._load_df()
+        self.features, self.tokens = self._load_or_build_features()
+        self.trigrams = {col: self._load_or_build_trigrams(col) for col in _TEXT_COLS}
+        self.codes = {
+            col: self.df[col].cat.codes.to_numpy() for col in _CATEGORICAL_COLS if col in self.df.columns
+        }
+        self.postings = self._build_postings()
+        self.lexical_indexes = {field: self._load_or_build_bm25(field) for field in _EMBEDDING_FIELDS}
         self.model = SentenceTransformer(_MODEL_NAME)
-        self.embeddings, self.nn = self._load_or_build_index()
+        self.field_embeddings = self._load_or_build_embeddings()
+        self.embeddings = self.field_embeddings[_COMBINED_FIELD]
+        self.indexes = {field: self._load_or_build_search_index(field) for field in _EMBEDDING_FIELDS}
+        self.index = self.indexes[_COMBINED_FIELD]
 
     def get_columns(self) -> List[str]:
         return self.df.columns.tolist()
@@ -42,34 +119,312 @@ class _Store:
     def get_flags(self) -> List[str]:
         return sorted(self.df[_FLAGS_COL].unique().tolist())
 
+    def filter_rows(self, filter: Dict[str, Any]) -> np.ndarray:
+        """Return the sorted row positions matching every column-value pair in ``filter``.
+
+        Values can be single values or lists for multiple matches, as in
+        ``data_slicer``. The most selective categorical key seeds the result
+        from its posting lists; the other keys only narrow those rows, so the
+        cost follows the size of the answer rather than of the dataset.
+        Non-categorical columns fall back to a mask over the remaining rows.
+        """
+        invalid_keys = [key for key in filter.keys() if key not in self.df.columns]
+        if invalid_keys:
+            raise ValueError(f"Invalid filter keys: {invalid_keys}. Available columns: {self.get_columns()}")
+
+        conditions = {col: val if isinstance(val, list) else [val] for col, val in filter.items()}
+        indexed = [col for col in conditions if col in self.postings]
+
+        if indexed:
+            seed = min(indexed, key=lambda col: sum(len(self.postings[col].get(v, ())) for v in conditions[col]))
+            # posting lists of different values are disjoint, so a sort is a union
+            lists = [self.postings[seed][v] for v in conditions[seed] if v in self.postings[seed]]
+            rows = np.sort(np.concatenate(lists)) if lists else np.empty(0, dtype=np.int64)
+        else:
+            seed = None
+            rows = np.arange(len(self.df))
+
+        for col, values in conditions.items():
+            if col == seed:
+                continue
+            if col in self.postings:
+                rows = rows[self._value_bitmap(col, values)[self.codes[col][rows]]]
+            else:
+                rows = rows[self.df[col].iloc[rows].isin(values).to_numpy()]
+
+        return rows
+
+    def view(self, rows: np.ndarray | None = None, columns: List[str] | None = None) -> pd.DataFrame:
+        """Materialize only the requested rows and columns of ``self.df``.
+
+        Selecting columns only references the existing arrays; rows are taken
+        after that, so the cost follows what is returned. With neither given
+        the shared frame itself is returned, so callers must never mutate the
+        result in place.
+        """
+        df = self.df if columns is None else self.df[columns]
+        return df if rows is None else df.iloc[rows]
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        field: str = _COMBINED_FIELD,
+        rows: np.ndarray | None = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k cosine search over ``field``, optionally restricted to ``rows``."""
+        if rows is None:
+            return self.indexes[field].search(queries, k)
+
+        # scoring only the candidate rows costs in proportion to the filter's
+        # selectivity, so they are scanned exactly whatever the backend
+        idx, scores = _ExactIndex(self.field_embeddings[field][rows]).search(queries, k)
+        return rows[idx], scores
+
+    def _value_bitmap(self, col: str, values: List[Any]) -> np.ndarray:
+        """Boolean lookup over the category codes of ``col``; the last slot is for missing values (code -1)."""
+        categories = self.df[col].cat.categories
+        bitmap = np.zeros(len(categories) + 1, dtype=bool)
+        bitmap[categories.get_indexer([v for v in values if v in self.postings[col]])] = True
+        return bitmap
+
+    def _build_postings(self) -> Dict[str, Dict[str, np.ndarray]]:
+        """Map each value of the categorical columns to its sorted row positions."""
+        postings = {}
+        for col, codes in self.codes.items():
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(self.df[col].cat.categories) + 1))
+            postings[col] = {
+                value: order[bounds[i]:bounds[i + 1]]
+                for i, value in enumerate(self.df[col].cat.categories)
+            }
+        return postings
+
+    def _load_or_build_features(self) -> Tuple[pd.DataFrame, Dict[str, Dict[str, Any]]]:
+        """Load the derived per-row text features, computing them once per dataset.
+
+        For every text column ``features`` holds ``{col}_length`` (characters),
+        ``{col}_words`` (whitespace tokens, as ``str.split()``) and ``{col}_norm``
+        (lowercased text), row-aligned with ``self.df``. ``tokens[col]`` holds the
+        same whitespace tokens flattened: ``rows`` (owning row position),
+        ``codes`` (index into ``vocab``) and ``vocab`` (in order of first use).
+        """
+        table = self._read_features()
+        if table is None:
+            with storage.build_lock(_FEATURES_FILE):
+                table = self._read_features()
+                if table is None:
+                    self._write_features()
+                    table = self._read_features()
+
+        token_cols = [f"{col}_tokens" for col in _TEXT_COLS]
+        features = table.drop(token_cols).to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+        tokens = {}
+        for col in _TEXT_COLS:
+            lists = table.column(f"{col}_tokens").combine_chunks()
+            flat = lists.flatten()
+            tokens[col] = {
+                "rows": pc.list_parent_indices(lists).to_numpy(),
+                "codes": flat.indices.to_numpy(),
+                "vocab": flat.dictionary.to_pylist(),
+            }
+        return features, tokens
+
+    def _read_features(self) -> pa.Table | None:
+        if not _FEATURES_FILE.exists():
+            return None
+        table = pa.ipc.open_file(pa.memory_map(str(_FEATURES_FILE), "r")).read_all()
+        if table.schema.metadata[b"fingerprint"].decode() != self.fingerprint:
+            return None
+        return table
+
+    def _load_or_build_trigrams(self, col: str) -> TrigramIndex:
+        """Trigram index over the lowercased ``col``, for literal substring search."""
+        source = {"dataset_fingerprint": self.fingerprint, "column": f"{col}_norm"}
+        index = TrigramIndex.load(_TRIGRAM_DIR / col, source)
+        if index is None:
+            with storage.build_lock(_TRIGRAM_DIR / col):
+                index = TrigramIndex.load(_TRIGRAM_DIR / col, source)
+                if index is None:
+                    TrigramIndex.build(pa.array(self.features[f"{col}_norm"].array)).save(_TRIGRAM_DIR / col, source)
+                    index = TrigramIndex.load(_TRIGRAM_DIR / col, source)
+        return index
+
+    def _load_or_build_bm25(self, field: str) -> BM25Index:
+        """BM25 index over the same text as the ``field`` embeddings."""
+        source = {"dataset_fingerprint": self.fingerprint, "field": field}
+        index = BM25Index.load(_BM25_DIR / field, source)
+        if index is None:
+            with storage.build_lock(_BM25_DIR / field):
+                index = BM25Index.load(_BM25_DIR / field, source)
+                if index is None:
+                    BM25Index.build(self._field_texts(field)).save(_BM25_DIR / field, source)
+                    index = BM25Index.load(_BM25_DIR / field, source)
+        return index
+
+    def _write_features(self) -> None:
+        names, columns = [], []
+        for col in _TEXT_COLS:
+            text = pa.array(self.df[col].array)
+            if isinstance(text, pa.ChunkedArray):
+                text = text.combine_chunks()
+            text = text.cast(pa.string())
+
+            split = pc.utf8_split_whitespace(text)
+            flat = pc.list_flatten(split)
+            # str.split() never yields empty tokens, arrow does at leading/trailing whitespace
+            keep = pc.not_equal(flat, "")
+            words = np.bincount(pc.list_parent_indices(split).filter(keep).to_numpy(), minlength=len(text))
+            offsets = np.concatenate([[0], np.cumsum(words)]).astype(np.int32)
+
+            names += [f"{col}_length", f"{col}_words", f"{col}_norm", f"{col}_tokens"]
+            columns += [
+                pc.utf8_length(text),
+                pa.array(words, type=pa.int32(), mask=text.is_null().to_numpy(zero_copy_only=False)),
+                pc.utf8_lower(text),
+                pa.ListArray.from_arrays(pa.array(offsets), pc.dictionary_encode(flat.filter(keep))),
+            ]
+
+        table = pa.table(columns, names=names).replace_schema_metadata({
+            "version": str(_FEATURES_VERSION),
+            "fingerprint": self.fingerprint,
+        })
+        _write_table(_FEATURES_FILE, table)
+
+    @staticmethod
+    def _load_df() -> Tuple[pd.DataFrame, str]:
+        """Load the dataset from the columnar snapshot, building it on first use.
+
+        The snapshot is an uncompressed Arrow IPC file, so it is memory-mapped
+        rather than read: text columns stay in the mapped Arrow buffers (shared
+        between processes) and only the small categorical codes are copied.
+        """
+        if not _SNAPSHOT_FILE.exists():
+            with storage.build_lock(_SNAPSHOT_FILE):
+                if not _SNAPSHOT_FILE.exists():
+                    _Store._write_snapshot()
+
+        table = pa.ipc.open_file(pa.memory_map(str(_SNAPSHOT_FILE), "r")).read_all()
+        fingerprint = table.schema.metadata[b"fingerprint"].decode()
+
+        df = table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+        for col in _CATEGORICAL_COLS:
+            if col in df.columns:
+                # keep categories sorted so groupby/sort order matches plain strings
+                df[col] = df[col].cat.reorder_categories(sorted(df[col].cat.categories))
+
+        return df, fingerprint
+
     @staticmethod
-    def _load_df() -> pd.DataFrame:
-        ds = load_dataset(
-            "bitext/Bitext-customer-support-llm-chatbot-training-dataset", split="train"
-        )
-        df = pd.DataFrame(ds)
-        
+    def _write_snapshot() -> None:
+        ds = load_dataset(_DATASET_NAME, split="train")
+        table = ds.with_format("arrow")[:]
+
         # Validate required columns exist
         required_cols = [_CATEGORY_COL, _INTENT_COL, _INSTRUCTION_COL, _RESPONSE_COL]
-        missing_cols = [col for col in required_cols if col not in df.columns]
+        missing_cols = [col for col in required_cols if col not in table.column_names]
         if missing_cols:
             raise ValueError(f"Dataset is missing required columns: {missing_cols}")
-            
-        return df
-
-    def _load_or_build_index(self):
-        if _EMB_FILE.exists() and _IDX_FILE.exists():
-            emb = joblib.load(_EMB_FILE)
-            nn = joblib.load(_IDX_FILE)
-            return emb, nn
-
-        texts = self.df[_INSTRUCTION_COL].astype(str) + " " + self.df[_RESPONSE_COL].astype(str)
-        emb = self.model.encode(texts.tolist(), show_progress_bar=True, batch_size=64)
-        nn = NearestNeighbors(metric="cosine", n_neighbors=5).fit(emb)
-
-        joblib.dump(emb, _EMB_FILE)
-        joblib.dump(nn, _IDX_FILE)
-        return emb, nn
+
+        digest = hashlib.sha256()
+        columns = []
+        for name in table.column_names:
+            column = table.column(name).cast(pa.string()).combine_chunks()
+            digest.update(name.encode())
+            for value in column.to_pylist():
+                digest.update(b"\0" if value is None else value.encode() + b"\1")
+            if name in _CATEGORICAL_COLS:
+                column = pc.dictionary_encode(column)
+            columns.append(column)
+
+        table = pa.table(columns, names=table.column_names).replace_schema_metadata({
+            "version": str(_SNAPSHOT_VERSION),
+            "source": _DATASET_NAME,
+            "fingerprint": digest.hexdigest(),
+        })
+
+        _write_table(_SNAPSHOT_FILE, table)
+
+    def _load_or_build_embeddings(self) -> Dict[str, np.ndarray]:
+        """Open one read-only memmapped embedding matrix per field, rebuilding if stale.
+
+        Every matrix is row-aligned with ``self.df``, so callers slice them by row
+        position instead of re-encoding text. The manifest records what the
+        matrices were built from; any mismatch with the current model or dataset
+        triggers a rebuild instead of silently serving vectors that no longer
+        line up with ``self.df``.
+        """
+        expected = self._expected_manifest()
+        files = {field: _VECTOR_DIR / f"{field}.npy" for field in _EMBEDDING_FIELDS}
+
+        def load() -> Dict[str, np.ndarray] | None:
+            if storage.read_json(_MANIFEST_FILE) != expected or not all(f.exists() for f in files.values()):
+                return None
+            return {field: np.load(f, mmap_mode="r") for field, f in files.items()}
+
+        embeddings = load()
+        if embeddings is not None:
+            return embeddings
+
+        with storage.build_lock(_VECTOR_DIR):
+            embeddings = load()
+            if embeddings is not None:
+                return embeddings
+
+            _VECTOR_DIR.mkdir(exist_ok=True)
+            # the manifest is written last, so a crashed build is always detected as stale
+            _MANIFEST_FILE.unlink(missing_ok=True)
+            for field, emb_file in files.items():
+                emb = self.model.encode(
+                    self._field_texts(field), show_progress_bar=True, batch_size=64, normalize_embeddings=True
+                )
+                storage.save_array(emb_file, emb.astype(_VECTOR_DTYPE))
+            storage.write_json(_MANIFEST_FILE, expected)
+            return load()
+
+    def _field_texts(self, field: str) -> List[str]:
+        if field == _COMBINED_FIELD:
+            texts = self.df[_INSTRUCTION_COL].astype(str) + " " + self.df[_RESPONSE_COL].astype(str)
+        else:
+            texts = self.df[field].astype(str)
+        return texts.tolist()
+
+    def _load_or_build_search_index(self, field: str) -> _ExactIndex | IVFIndex:
+        embeddings = self.field_embeddings[field]
+        if _SEARCH_BACKEND == "exact":
+            return _ExactIndex(embeddings)
+        if _SEARCH_BACKEND != "ivf":
+            raise ValueError(f"Unknown search backend: {_SEARCH_BACKEND!r}. Use 'exact' or 'ivf'")
+
+        source = {**self._expected_manifest(), "field": field}
+        index = IVFIndex.load(_IVF_DIR / field, source, _IVF_NLIST, _IVF_NPROBE)
+        if index is None:
+            with storage.build_lock(_IVF_DIR / field):
+                index = IVFIndex.load(_IVF_DIR / field, source, _IVF_NLIST, _IVF_NPROBE)
+                if index is None:
+                    IVFIndex.build(embeddings, nlist=_IVF_NLIST, nprobe=_IVF_NPROBE).save(_IVF_DIR / field, source)
+                    index = IVFIndex.load(_IVF_DIR / field, source, _IVF_NLIST, _IVF_NPROBE)
+        return index
+
+    def _expected_manifest(self) -> Dict[str, Any]:
+        return {
+            "version": _VECTOR_STORE_VERSION,
+            "model": _MODEL_NAME,
+            "dim": self.model.get_sentence_embedding_dimension(),
+            "rows": len(self.df),
+            "dtype": np.dtype(_VECTOR_DTYPE).name,
+            "normalized": True,
+            "fields": _EMBEDDING_FIELDS,
+            "dataset_fingerprint": self.fingerprint,
+        }
+
+
+def _write_table(path: Path, table: pa.Table) -> None:
+    """Write an uncompressed Arrow IPC file; readers never see a partial one."""
+    with storage.replacing(path) as tmp_file, pa.OSFile(str(tmp_file), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
 
 
 _store = _Store()
\ No newline at end of file
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict
+
+from bitext import storage
+
+
+class ResultCache:
+    """Size-bounded on-disk cache of JSON-serializable tool results.
+
+    Each entry is one ``<sha256 of key>.json`` file. Reads touch the file's
+    mtime, so evicting the oldest mtimes first is least-recently-used
+    eviction, and the recency survives restarts. Writes go through
+    ``storage.write_text``, so readers never see a partial entry.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: Dict[str, Any]) -> Any | None:
+        path = self._path(key)
+        try:
+            value = json.loads(path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted by a concurrent writer; the value we read is still valid
+        return value
+
+    def put(self, key: Dict[str, Any], value: Any) -> None:
+        path = self._path(key)
+        storage.write_text(path, json.dumps(value))
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _path(self, key: Dict[str, Any]) -> Path:
+        digest = hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()
+        return self.directory / f"{digest}.json"
@@ -0,0 +1,105 @@
+"""Crash- and race-safe persistence of the derived artifacts in the cache directory.
+
+Every file is written to a temp file unique to the writing process and thread,
+then moved into place with ``os.replace``, so readers only ever see complete
+files. A directory of arrays is described by a ``manifest.json`` that is
+removed before and written after the arrays, so a crashed save is always
+detected as stale. ``build_lock`` serializes builders across processes, so
+workers starting together on a cold cache build each artifact once.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, concurrent builders only duplicate work
+    fcntl = None
+
+
+_MANIFEST_NAME = "manifest.json"
+
+
+def tmp_path(path: Path) -> Path:
+    """A sibling of ``path`` that no other process or thread writes to."""
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+@contextmanager
+def replacing(path: Path) -> Iterator[Path]:
+    """Yield a temp path to write ``path``'s new content to; it replaces ``path`` once written."""
+    tmp_file = tmp_path(path)
+    try:
+        yield tmp_file
+        os.replace(tmp_file, path)
+    finally:
+        tmp_file.unlink(missing_ok=True)
+
+
+def write_text(path: Path, text: str) -> None:
+    with replacing(path) as tmp_file:
+        tmp_file.write_text(text)
+
+
+def write_json(path: Path, value: Any) -> None:
+    write_text(path, json.dumps(value, indent=2))
+
+
+def read_json(path: Path) -> Any | None:
+    """The parsed file, or None if it does not exist."""
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_array(path: Path, array: np.ndarray) -> None:
+    # through a file object, as np.save would append ".npy" to the temp name
+    with replacing(path) as tmp_file, open(tmp_file, "wb") as f:
+        np.save(f, array)
+
+
+def save_arrays(
+    directory: Path,
+    arrays: Dict[str, np.ndarray],
+    manifest: Dict[str, Any],
+    json_files: Dict[str, Any] | None = None,
+) -> None:
+    """Save ``{name}.npy`` per array and ``{name}.json`` per JSON value, then the manifest."""
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest_file = directory / _MANIFEST_NAME
+    manifest_file.unlink(missing_ok=True)
+    for name, array in arrays.items():
+        save_array(directory / f"{name}.npy", array)
+    for name, value in (json_files or {}).items():
+        write_json(directory / f"{name}.json", value)
+    write_json(manifest_file, manifest)
+
+
+def load_manifest(directory: Path) -> Dict[str, Any] | None:
+    return read_json(directory / _MANIFEST_NAME)
+
+
+def load_arrays(directory: Path, names: Iterable[str]) -> Dict[str, np.ndarray]:
+    """Memory-map the arrays ``save_arrays`` wrote."""
+    return {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in names}
+
+
+@contextmanager
+def build_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive lock on ``{path}.lock`` across processes (and threads).
+
+    Callers check for a valid artifact, and only if there is none take the
+    lock, check again and build, so the lock is never taken once it exists.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(f"{path}.lock", "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+import pyarrow as pa
+
+from bitext import storage
+
+
+_TRIGRAM_VERSION = 1
+# once this few candidates remain, verifying them is cheaper than intersecting more lists
+_ENOUGH_CANDIDATES = 64
+_BUILD_BLOCK_ROWS = 4096
+_ARRAYS = ("grams", "offsets", "postings")
+
+
+class TrigramIndex:
+    """Inverted index from byte trigrams to the rows containing them.
+
+    A row can only contain a literal substring if it contains every trigram
+    of that substring, so intersecting the posting lists of the needle's
+    trigrams yields a small superset of the matching rows. Callers still
+    verify candidates against the text; the index only narrows the scan.
+
+    Built over already-normalized (lowercased) text; needles must be
+    normalized the same way.
+    """
+
+    def __init__(self, grams: np.ndarray, offsets: np.ndarray, postings: np.ndarray) -> None:
+        self.grams = grams
+        self.offsets = offsets
+        self.postings = postings
+
+    @classmethod
+    def build(cls, text: pa.Array) -> "TrigramIndex":
+        """Index every UTF-8 byte trigram of every row of a string array."""
+        if isinstance(text, pa.ChunkedArray):
+            text = text.combine_chunks()
+        text = text.cast(pa.large_string())
+        offsets = np.frombuffer(text.buffers()[1], dtype=np.int64)[text.offset:text.offset + len(text) + 1]
+        data = np.frombuffer(text.buffers()[2] or b"", dtype=np.uint8)
+
+        # (trigram, row) pairs packed into one int64 so a single sort orders by trigram, then row
+        blocks = []
+        for first_row in range(0, len(text), _BUILD_BLOCK_ROWS):
+            block_offsets = offsets[first_row:first_row + _BUILD_BLOCK_ROWS + 1]
+            block = data[block_offsets[0]:block_offsets[-1]].astype(np.uint32)
+            ends = block_offsets[1:] - block_offsets[0]
+            rows = np.repeat(np.arange(first_row, first_row + len(ends), dtype=np.int64), np.diff(block_offsets))
+
+            # a trigram starting at byte p belongs to its row only if it ends inside that row
+            starts = np.arange(max(len(block) - 2, 0))
+            starts = starts[starts + 2 < ends[rows[starts] - first_row]]
+            codes = (block[starts] << 16) | (block[starts + 1] << 8) | block[starts + 2]
+            blocks.append(np.unique((codes.astype(np.int64) << 32) | rows[starts]))
+
+        pairs = np.sort(np.concatenate(blocks)) if blocks else np.empty(0, dtype=np.int64)
+        grams, first = np.unique((pairs >> 32).astype(np.uint32), return_index=True)
+        return cls(
+            grams=grams,
+            offsets=np.append(first, len(pairs)).astype(np.int64),
+            postings=(pairs & 0xFFFFFFFF).astype(np.int32),
+        )
+
+    def candidates(self, needle: bytes) -> np.ndarray | None:
+        """Sorted rows that may contain ``needle``, or None if it is too short to narrow."""
+        if len(needle) < 3:
+            return None
+
+        data = np.frombuffer(needle, dtype=np.uint8).astype(np.uint32)
+        codes = np.unique((data[:-2] << 16) | (data[1:-1] << 8) | data[2:])
+        slots = np.searchsorted(self.grams, codes)
+        if np.any(slots >= len(self.grams)) or np.any(self.grams[np.minimum(slots, len(self.grams) - 1)] != codes):
+            return np.empty(0, dtype=np.int32)
+
+        # intersect the rarest lists first, so the running result shrinks fastest
+        sizes = self.offsets[slots + 1] - self.offsets[slots]
+        rows = None
+        for slot in slots[np.argsort(sizes, kind="stable")]:
+            posting = self.postings[self.offsets[slot]:self.offsets[slot + 1]]
+            rows = np.asarray(posting) if rows is None else np.intersect1d(rows, posting, assume_unique=True)
+            if len(rows) <= _ENOUGH_CANDIDATES:
+                break
+        return rows
+
+    def save(self, directory: Path, source: Dict[str, Any]) -> None:
+        """Persist the index; ``source`` identifies the text it was built from."""
+        storage.save_arrays(
+            directory,
+            {name: getattr(self, name) for name in _ARRAYS},
+            {"version": _TRIGRAM_VERSION, "source": source},
+        )
+
+    @classmethod
+    def load(cls, directory: Path, source: Dict[str, Any]) -> "TrigramIndex | None":
+        """Memory-map a saved index, or return None if it is missing or stale."""
+        if storage.load_manifest(directory) != {"version": _TRIGRAM_VERSION, "source": source}:
+            return None
+        return cls(**storage.load_arrays(directory, _ARRAYS))
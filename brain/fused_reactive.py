@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+from typing import Any, Awaitable, List, Dict, Tuple
+from .reactive import Reactive
+from .strategy import EventSink, emit_message
+from chat.message import MessageType, m
+from .fused_thinking_step import FusedThinkingStep, _system_prompt as _thinking_system_prompt
+
+class FusedReactive(Reactive):
+    """Reactive mode with one LLM call per step instead of up to three.
+
+    ``Reactive`` asks for a thinking step, then for the tool call, and
+    finally for the answer. Here a single structured call returns the
+    reasoning together with either the tool calls or the final answer. The
+    message trail (THINKING, TOOL_CALL, TOOL_RESULT) is the same, so it
+    renders identically.
+    """
+
+    async def athink(
+        self,
+        messages: List[Dict[str, str]],
+        first_step: Awaitable[FusedThinkingStep] | None = None,
+        on_event: EventSink | None = None,
+    ) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
+
+        working = messages.copy()
+        new_msgs: List[Dict[str, str]] = []
+
+        while True:
+            if first_step is not None:
+                step, first_step = await first_step, None
+            else:
+                step = await self._afused_step(working, on_event)
+            thinking_msg = m(
+                role="assistant",
+                content=step.next_step,
+                reasoning=step.reasoning,
+                message_type=MessageType.THINKING
+            )
+            working.append(thinking_msg)
+            new_msgs.append(thinking_msg)
+            emit_message(on_event, thinking_msg)
+
+            print(f"\n{thinking_msg['reasoning']}")
+            print(f"My next step should be: {thinking_msg['content']}")
+
+            if not step.tool_calls:
+                if step.answer.strip():
+                    return {"content": step.answer, "reasoning": step.reasoning}, new_msgs
+                # neither acted nor answered: ask for the answer on its own, as reactive mode does
+                answer, _ = await self._afinal_response(working, on_event)
+                return answer, new_msgs
+
+            # the same shape as a native tool-calling message, with ids we assign; they
+            # depend only on the position in the conversation, so recorded runs replay
+            msg = SimpleNamespace(
+                content=None,
+                tool_calls=[
+                    SimpleNamespace(
+                        id=f"call_{len(working)}_{i}",
+                        function=SimpleNamespace(name=call.name, arguments=call.arguments),
+                    )
+                    for i, call in enumerate(step.tool_calls)
+                ],
+            )
+            working, new_msgs = await self._ahandle_tool_calls(msg, working, new_msgs, on_event)
+
+    async def afirst_step(self, messages: List[Dict[str, str]], on_event: EventSink | None = None) -> FusedThinkingStep:
+        return await self._afused_step(messages, on_event)
+
+    async def _afused_step(self, messages: List[Dict[str, str]], on_event: EventSink | None = None) -> FusedThinkingStep:
+
+        # the conversation keeps its own system prompt; the step instructions come last
+        prompt = messages + [{"role": "system", "content": _thinking_system_prompt}]
+
+        if on_event is None:
+            response = await self._llm.achat(
+                prompt,
+                tools_json=None,
+                response_format=FusedThinkingStep,
+            )
+        else:
+            # 'tool_calls' comes before 'answer', so it is complete by the time the
+            # answer streams; text next to tool calls is not a final answer
+            streamed = {"answer": ""}
+            def on_delta(snapshot: str, parsed: Any) -> None:
+                if not isinstance(parsed, dict) or parsed.get("tool_calls"):
+                    return
+                answer = parsed.get("answer")
+                if isinstance(answer, str) and answer and answer != streamed["answer"]:
+                    streamed["answer"] = answer
+                    on_event({"type": "answer_delta", "content": answer})
+
+            response = await self._llm.astream(
+                prompt,
+                tools_json=None,
+                response_format=FusedThinkingStep,
+                on_delta=on_delta,
+            )
+        return response.choices[0].message.parsed
@@ -0,0 +1,49 @@
+from pydantic import BaseModel, Field
+from typing import List
+from chat.message import MessageType
+
+_system_prompt = (
+    "You are thinking out loud and acting in the same step. "
+    "Review the conversation above to understand the user's original request, "
+    "what information has already been gathered, and what is still missing.\n\n"
+    "Then do exactly one of the following:\n"
+    "- If information is still missing, fill 'tool_calls' with the tool calls that gather it, "
+    "using only the tools and parameters documented in the first system message. "
+    "Calls that do not depend on each other's results can be made together. Leave 'answer' empty.\n"
+    "- If you have everything needed, leave 'tool_calls' empty and write the complete final response "
+    "to the user in 'answer'.\n\n"
+    "Respond using the fields:\n"
+    "- 'reasoning': a short explanation of your decision, referencing the conversation history\n"
+    "- 'next_step': a one-sentence description of what you are doing now\n"
+    "- 'tool_calls': the tool calls to make now, each with the tool 'name' and its 'arguments' "
+    "as a JSON object string, e.g. '{\"group_by\": \"category\"}'\n"
+    "- 'answer': the final response to the user, only when no tool calls are needed"
+)
+
+class FusedToolCall(BaseModel):
+    name: str = Field(
+        description="Name of the tool to call"
+    )
+    arguments: str = Field(
+        description="The tool arguments as a JSON object string, e.g. '{\"text\": \"refund\", \"k\": 5}'"
+    )
+
+class FusedThinkingStep(BaseModel):
+    reasoning: str = Field(
+        description="A brief explanation of what is still needed, or why the request can now be answered."
+    )
+    next_step: str = Field(
+        description="A single clear sentence describing the action taken in this step."
+    )
+    tool_calls: List[FusedToolCall] = Field(
+        description="Tool calls to execute now; empty when answering",
+        default_factory=list
+    )
+    answer: str = Field(
+        description="The final response to the user when no tool calls are needed; empty otherwise",
+        default=""
+    )
+    message_type: MessageType = Field(
+        default=MessageType.THINKING,
+        description="Type of message - always THINKING for this model"
+    )
@@ -1,6 +1,7 @@
-from typing import List, Dict, Tuple
-from .strategy import Strategy
-from .planning_thinking import PlanningThinking
+import asyncio
+from typing import Awaitable, List, Dict, Tuple
+from .strategy import EventSink, Strategy, emit_message
+from .planning_thinking import PlanningStep, PlanningThinking
 from chat.message import MessageType, m
 from tools.tools import TOOLS_SCHEMA
 from .planning_thinking import _system_prompt as _thinking_system_prompt
@@ -24,9 +25,14 @@ class Plan(Strategy):
     def get_system_prompt(self) -> str:
         return f"{self._get_base_prompt()}\n\n{_planning_instructions}"
 
-    def think(self, messages: List[Dict[str, str]]) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
+    async def athink(
+        self,
+        messages: List[Dict[str, str]],
+        first_step: Awaitable[PlanningThinking] | None = None,
+        on_event: EventSink | None = None,
+    ) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
         
-        plan = self._plan_thinking(messages)
+        plan = await (first_step if first_step is not None else self._aplan_thinking(messages))
         
         working = messages.copy()
         new_msgs = []
@@ -43,6 +49,7 @@ class Plan(Strategy):
         )
         working.append(plan_msg)
         new_msgs.append(plan_msg)
+        emit_message(on_event, plan_msg)
         
         print(f"\n📋 The Plan:\n{plan.goal}")
         for i, step in enumerate(plan.steps):
@@ -54,36 +61,81 @@ class Plan(Strategy):
                 print(f"      Depends on: {[d + 1 for d in step.depends_on]}")
         
         print("\nExecuting the plan...")
+
+        # every step is dispatched as soon as the steps it depends on are done
+        dependencies, order = _schedule(plan.steps)
+        context = working.copy()
+        tasks: Dict[int, asyncio.Task] = {}
+        for i in order:
+            tasks[i] = asyncio.ensure_future(self._arun_step(
+                i, plan.steps[i], context, [tasks[d] for d in dependencies[i]], on_event
+            ))
+        try:
+            outputs = await asyncio.gather(*(tasks[i] for i in range(len(plan.steps))))
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+
+        # the history lists the steps in plan order, whichever finished first
+        for step_msgs in outputs:
+            working.extend(step_msgs)
+            new_msgs.extend(step_msgs)
         
-        for i, step in enumerate(plan.steps):
-            step_msg = m(
-                role="assistant",
-                content=step.action,
-                reasoning=step.reasoning,
-                message_type=MessageType.THINKING
-            )
-            working.append(step_msg)
-            new_msgs.append(step_msg)
-            
-            print(f"\n📝 Step {i+1}: {step.reasoning}")
-            
-            if "tool" in step.action.lower():
-                resp = self._llm.chat(working, tools_json=TOOLS_SCHEMA)
-                msg = resp.choices[0].message
-                
-                if msg.tool_calls:
-                    working, new_msgs = self._handle_tool_calls(msg, working, new_msgs)
-        
-        answer, _ = self._final_response(working)
+        answer, _ = await self._afinal_response(working, on_event)
         
         return {
             "content": answer["content"],
             "reasoning": answer["reasoning"]
         }, new_msgs
     
-    def _plan_thinking(self, messages: list[dict]) -> PlanningThinking:
+    async def _arun_step(
+        self,
+        i: int,
+        step: PlanningStep,
+        context: List[Dict[str, str]],
+        dependencies: List[Awaitable[List[Dict[str, str]]]],
+        on_event: EventSink | None = None,
+    ) -> List[Dict[str, str]]:
+        """Run one step on the conversation, the plan and its dependencies' outputs; returns the step's messages."""
+        dep_outputs = await asyncio.gather(*dependencies)
+
+        step_msg = m(
+            role="assistant",
+            content=step.action,
+            reasoning=step.reasoning,
+            message_type=MessageType.THINKING
+        )
+        step_msgs = [step_msg]
+        emit_message(on_event, step_msg)
+
+        print(f"\n📝 Step {i+1}: {step.reasoning}")
+
+        working = context + [msg for msgs in dep_outputs for msg in msgs] + [step_msg]
+        resp = await self._llm.achat(working, tools_json=TOOLS_SCHEMA)
+        msg = resp.choices[0].message
+
+        if msg.tool_calls:
+            _, step_msgs = await self._ahandle_tool_calls(msg, working, step_msgs, on_event)
+        elif msg.content and msg.content.strip():
+            # a step answered in text (a comparison, a summary): that text is its output
+            result_msg = m(
+                role="assistant",
+                content=msg.content.strip(),
+                reasoning=step.expected_result,
+                message_type=MessageType.THINKING
+            )
+            step_msgs.append(result_msg)
+            emit_message(on_event, result_msg)
+        return step_msgs
+
+    async def afirst_step(self, messages: List[Dict[str, str]], on_event: EventSink | None = None) -> PlanningThinking:
+        # a plan never answers, so there is nothing to stream
+        return await self._aplan_thinking(messages)
+
+    async def _aplan_thinking(self, messages: list[dict]) -> PlanningThinking:
         
-        response = self._llm.chat(
+        response = await self._llm.achat(
             messages + [{
                 "role": "system",
                 "content": _thinking_system_prompt
@@ -91,4 +143,36 @@ class Plan(Strategy):
             tools_json=None,
             response_format=PlanningThinking
         )
-        return response.choices[0].message.parsed
\ No newline at end of file
+        return response.choices[0].message.parsed
+
+
+def _schedule(steps: List[PlanningStep]) -> Tuple[List[List[int]], List[int]]:
+    """Validated dependencies of every step and an order in which to dispatch them.
+
+    Out-of-range and self references are dropped. A plan whose dependencies
+    form a cycle cannot be scheduled as a DAG, so it falls back to running
+    the steps in plan order, each seeing every earlier step.
+    """
+    n = len(steps)
+    dependencies = [
+        sorted({d for d in step.depends_on if 0 <= d < n and d != i})
+        for i, step in enumerate(steps)
+    ]
+
+    # Kahn's algorithm; steps left over are on a cycle
+    dependents: List[List[int]] = [[] for _ in range(n)]
+    pending = [len(deps) for deps in dependencies]
+    for i, deps in enumerate(dependencies):
+        for d in deps:
+            dependents[d].append(i)
+    order = [i for i in range(n) if not pending[i]]
+    for i in order:
+        for j in dependents[i]:
+            pending[j] -= 1
+            if not pending[j]:
+                order.append(j)
+
+    if len(order) < n:
+        print("\n⚠️  The plan's dependencies form a cycle; running the steps in order.")
+        return [list(range(i)) for i in range(n)], list(range(n))
+    return dependencies, order
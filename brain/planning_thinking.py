@@ -4,6 +4,8 @@ from typing import List, Dict, Any
 _system_prompt = (
     "Create a structured plan to answer the user's question. "
     "Break down the work into clear steps, considering dependencies between steps. "
+    "Steps that do not depend on each other run in parallel, and each step only sees the results "
+    "of the steps it depends on, so list every step whose result it needs. "
     "For each step, specify what needs to be done and what we expect to get from it."
 )
 
@@ -18,7 +20,7 @@ class PlanningStep(BaseModel):
         description="What we expect to get from this step"
     )
     depends_on: List[int] = Field(
-        description="Indices of steps this step depends on (empty list if no dependencies)",
+        description="Zero-based indices of the earlier steps whose results this step needs (empty list if none)",
         default_factory=list
     )
 
@@ -1,5 +1,5 @@
-from typing import List, Dict, Tuple
-from .strategy import Strategy
+from typing import Awaitable, List, Dict, Tuple
+from .strategy import EventSink, Strategy, emit_message
 from chat.message import MessageType, m
 from tools.tools import TOOLS_SCHEMA
 from .reactive_thinking_step import ReactiveThinkingStep, _system_prompt as _thinking_system_prompt
@@ -18,13 +18,21 @@ class Reactive(Strategy):
     def get_system_prompt(self) -> str:
         return f"{self._get_base_prompt()}\n\n{_reactive_instructions}"
 
-    def think(self, messages: List[Dict[str, str]]) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
+    async def athink(
+        self,
+        messages: List[Dict[str, str]],
+        first_step: Awaitable[ReactiveThinkingStep] | None = None,
+        on_event: EventSink | None = None,
+    ) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
 
         working = messages.copy()
         new_msgs: List[Dict[str, str]] = []
 
         while True:
-            thinking_step = self._think_next_step(working)
+            if first_step is not None:
+                thinking_step, first_step = await first_step, None
+            else:
+                thinking_step = await self._athink_next_step(working)
             thinking_msg = m(
                 role="assistant",
                 content=thinking_step.next_step,
@@ -33,45 +41,43 @@ class Reactive(Strategy):
             )
             working.append(thinking_msg)
             new_msgs.append(thinking_msg)
+            emit_message(on_event, thinking_msg)
 
             print(f"\n{thinking_msg['reasoning']}")
             print(f"My next step should be: {thinking_msg['content']}")
 
             if not thinking_step.use_tool:
-                answer, _ = self._final_response(working)
+                answer, _ = await self._afinal_response(working, on_event)
                 return answer, new_msgs
 
             # Now get the tool calls - request only one tool
-            resp = self._llm.chat(
+            resp = await self._llm.achat(
                 working, 
                 tools_json=TOOLS_SCHEMA
             )
             msg = resp.choices[0].message
 
             if msg.tool_calls:
-                working, new_msgs = self._handle_tool_calls(msg, working, new_msgs)
+                working, new_msgs = await self._ahandle_tool_calls(msg, working, new_msgs, on_event)
                 continue
 
             # no tool calls → final answer
-            answer, _ = self._final_response(working)
+            answer, _ = await self._afinal_response(working, on_event)
             
             return answer, new_msgs
         
-    def _think_next_step(self, messages: list[dict]) -> ReactiveThinkingStep:
+    async def afirst_step(self, messages: List[Dict[str, str]], on_event: EventSink | None = None) -> ReactiveThinkingStep:
+        # a thinking step never answers, so there is nothing to stream
+        return await self._athink_next_step(messages)
 
-        # convert the first system message to user message if it exists
-        modified_messages = messages.copy()
-        if modified_messages and modified_messages[0]["role"] == "system":
-            modified_messages[0] = {
-                "role": "user",
-                "content": modified_messages[0]["content"]
-            }
+    async def _athink_next_step(self, messages: list[dict]) -> ReactiveThinkingStep:
 
-        # add new system message at the beginning
-        modified_messages.insert(0, {"role": "system", "content": _thinking_system_prompt})
+        # the conversation keeps its system prompt first, so this call shares its prompt
+        # prefix with every other call; the step instructions come last
+        prompt = messages + [{"role": "system", "content": _thinking_system_prompt}]
 
-        response = self._llm.chat(
-            modified_messages,
+        response = await self._llm.achat(
+            prompt,
             tools_json=None,
             response_format=ReactiveThinkingStep,
         )
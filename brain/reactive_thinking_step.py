@@ -3,7 +3,7 @@ from chat.message import MessageType
 
 _system_prompt = (
     "You are thinking out loud before deciding whether to use a tool. "
-    "You will be given a conversation history between a user and an assistant. "
+    "The conversation above is between a user and an assistant. "
     "Your goal is to analyze this conversation and determine what single next action will best move toward fully answering the user's request.\n\n"
     "First, review the conversation history to understand:\n"
     "- What is the user's original request?\n"
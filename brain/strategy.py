@@ -1,18 +1,85 @@
 from abc import abstractmethod
-from typing import Any,List, Dict, Tuple
+from typing import Any, Awaitable, Callable, List, Dict, Tuple
 from chat.service import Service as ChatService
 from .final_response import FinalResponse
+import asyncio
 import json
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from chat.message import MessageType, m
-from tools.tools import _TOOL_FUNCS
+from chat.sync import run_sync
+from tools.tools import _TOOL_FUNCS, _CONCURRENCY_LIMITS, is_cacheable, tool_resource
+from bitext.datastore import _store
+from .tool_cache import ToolCache
+
+# receives agent events: {"type": "message", "message": ...} for every new
+# history message and {"type": "answer_delta", "content": ...} while the final answer streams
+EventSink = Callable[[Dict[str, Any]], None]
+
+
+def emit_message(on_event: EventSink | None, message: Dict[str, Any]) -> None:
+    if on_event is not None:
+        on_event({"type": "message", "message": message})
+
+
+def tool_cache_stats() -> Dict[str, int]:
+    """Hits, misses, entries and bytes of the process-wide tool result cache."""
+    return _tool_cache.stats()
+
+# shared by every strategy in the process, so repeated calls are hits across chat sessions too
+_tool_cache = ToolCache(max_bytes=int(os.environ.get("BITEXT_TOOL_CACHE_MB", "32")) * 2**20)
+# tools mostly run numpy/BLAS or tokenizers, which release the GIL, so threads
+# overlap them without pickling the shared datastore into worker processes
+_tool_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("BITEXT_TOOL_WORKERS", "4")), thread_name_prefix="tool")
+# slots of the limited tool resources, per event loop, as asyncio primitives
+# belong to the loop they are first used on
+_tool_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+# built on first use and then reused, so every system prompt of every mode and
+# session starts with the same bytes and the provider can serve it from its prompt cache
+_base_prompt: str | None = None
+
+
+def _tool_slot(resource: str | None):
+    if resource is None:
+        return nullcontext()
+    slots = _tool_slots.setdefault(asyncio.get_running_loop(), {})
+    if resource not in slots:
+        slots[resource] = asyncio.Semaphore(_CONCURRENCY_LIMITS[resource])
+    return slots[resource]
 
 class Strategy:
 
     def __init__(self, llm: ChatService):
         self._llm = llm
 
-    @abstractmethod
     def think(self, messages: List[Dict[str, str]]) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
+        return run_sync(self.athink(messages))
+
+    @abstractmethod
+    async def athink(
+        self,
+        messages: List[Dict[str, str]],
+        first_step: Awaitable[Any] | None = None,
+        on_event: EventSink | None = None,
+    ) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
+        """Answer the conversation in ``messages``.
+
+        ``first_step``, if given, is an already started ``afirst_step`` call
+        on the same messages, whose result replaces the first LLM call.
+        ``on_event``, if given, receives every new message as it is produced
+        and the final answer as it streams in; see ``Agent.ask_async``.
+        """
+        pass
+
+    @abstractmethod
+    async def afirst_step(self, messages: List[Dict[str, str]], on_event: EventSink | None = None) -> Any:
+        """The first LLM call ``athink`` makes, which depends only on ``messages``.
+
+        ``on_event``, if given, receives the answer as it streams in, should
+        this call already answer.
+        """
         pass
 
     @abstractmethod
@@ -20,6 +87,12 @@ class Strategy:
         pass
 
     def _get_base_prompt(self) -> str:
+        global _base_prompt
+        if _base_prompt is None:
+            _base_prompt = self._build_base_prompt()
+        return _base_prompt
+
+    def _build_base_prompt(self) -> str:
 
         tools_doc = self._generate_tool_documentation(_TOOL_FUNCS)
 
@@ -62,13 +135,33 @@ class Strategy:
         
         return "\n".join(docs)
 
-    def _final_response(self, messages: List[Dict[str, str]]) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
+    async def _afinal_response(
+        self,
+        messages: List[Dict[str, str]],
+        on_event: EventSink | None = None,
+    ) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
         
-        resp = self._llm.chat(
-            messages,
-            tools_json=None,
-            response_format=FinalResponse
-        )
+        if on_event is None:
+            resp = await self._llm.achat(
+                messages,
+                tools_json=None,
+                response_format=FinalResponse
+            )
+        else:
+            # content is the first field of FinalResponse, so it streams before the reasoning
+            streamed = {"content": ""}
+            def on_delta(snapshot: str, parsed: Any) -> None:
+                content = parsed.get("content") if isinstance(parsed, dict) else None
+                if isinstance(content, str) and content != streamed["content"]:
+                    streamed["content"] = content
+                    on_event({"type": "answer_delta", "content": content})
+
+            resp = await self._llm.astream(
+                messages,
+                tools_json=None,
+                response_format=FinalResponse,
+                on_delta=on_delta
+            )
         final_response = resp.choices[0].message.parsed
         answer = {
             "content": final_response.content,
@@ -79,11 +172,12 @@ class Strategy:
         
         return answer, []
     
-    def _handle_tool_calls(
+    async def _ahandle_tool_calls(
         self, 
         msg, 
         working: List[Dict[str, str]], 
-        new_msgs: List[Dict[str, str]]
+        new_msgs: List[Dict[str, str]],
+        on_event: EventSink | None = None
     ) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
         
         assistant_msg = m(
@@ -105,15 +199,23 @@ class Strategy:
         )
         working.append(assistant_msg)
         new_msgs.append(assistant_msg)
+        emit_message(on_event, assistant_msg)
         
         print(f"\n🔧 {assistant_msg['reasoning']}\n")
 
-        # run each tool, append its reply
+        # run the tools concurrently, then append their replies in call order
+        calls = []
         for tc in msg.tool_calls:
+            try:
+                args = json.loads(tc.function.arguments or "{}")
+            except json.JSONDecodeError:
+                args = None
+            print(f"   🛠️  Executing tool: {tc.function.name} with args: {args}")
+            calls.append((tc, args))
+        results = await self._arun_tools([(tc.function.name, args) for tc, args in calls])
+
+        for (tc, args), result in zip(calls, results):
             name = tc.function.name
-            args = json.loads(tc.function.arguments or "{}")
-            print(f"   🛠️  Executing tool: {name} with args: {args}")
-            result = self._execute_tool(name, args)
 
             tool_msg = m(
                 role="tool",
@@ -124,6 +226,7 @@ class Strategy:
             )
             working.append(tool_msg)
             new_msgs.append(tool_msg)
+            emit_message(on_event, tool_msg)
             
             # Print tool execution
             result = json.loads(tool_msg['content'])
@@ -139,6 +242,20 @@ class Strategy:
 
         return working, new_msgs
     
+    async def _arun_tools(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """Execute ``(name, args)`` calls concurrently on the tool pool, off the event loop.
+
+        Results keep the order of ``calls``.
+        """
+        return await asyncio.gather(*(self._arun_tool(name, args) for name, args in calls))
+
+    async def _arun_tool(self, name: str, args: Dict[str, Any]):
+        # wait for a limited resource here, not in a pool worker, so queued calls
+        # never hold the workers that calls without limits could run on
+        resource = tool_resource(name, args) if isinstance(args, dict) else None
+        async with _tool_slot(resource):
+            return await asyncio.wrap_future(_tool_pool.submit(self._execute_tool, name, args))
+
     def _execute_tool(self, name: str, args: Dict[str, Any]):
         """Execute a tool with the given arguments.
         
@@ -149,6 +266,11 @@ class Strategy:
         Returns:
             The result of the tool execution
         """
+        if name not in _TOOL_FUNCS:
+            return {"error": f"Unknown tool: {name}", "available_tools": list(_TOOL_FUNCS)}
+        if not isinstance(args, dict):
+            return {"error": "Tool arguments must be a JSON object", "tool": name}
+
         # Get the tool function and schema
         func, schema = _TOOL_FUNCS[name]
         
@@ -167,9 +289,19 @@ class Strategy:
         if "category" in args:
             args["category"] = self._normalize_category(args["category"])
             
-        # Execute the tool
+        cacheable = is_cacheable(name, args)
+        if cacheable:
+            key = ToolCache.key(name, args, _store.fingerprint)
+            hit, result = _tool_cache.get(key)
+            if hit:
+                return result
+
+        # Execute the tool; errors are returned to the model but never cached
         try:
-            return func(**args)
+            result = func(**args)
+            if cacheable:
+                _tool_cache.put(key, result)
+            return result
         except Exception as e:
             return {
                 "error": str(e),
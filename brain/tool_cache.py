@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+
+class ToolCache:
+    """Thread-safe LRU cache of tool results, bounded by their JSON size.
+
+    Results are stored as the UTF-8 encoded JSON the tool message would carry
+    anyway, which both measures their size in bytes and hands every hit a
+    fresh copy, so a caller mutating a result cannot corrupt the cache.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Tuple[str, str, str], bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name: str, args: Dict[str, Any], scope: str) -> Tuple[str, str, str]:
+        """Canonical key: argument order and whitespace never cause a miss."""
+        return name, json.dumps(args, sort_keys=True, separators=(",", ":"), default=str), scope
+
+    def get(self, key: Tuple[str, str, str]) -> Tuple[bool, Any]:
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return True, json.loads(payload)
+
+    def put(self, key: Tuple[str, str, str], result: Any) -> None:
+        try:
+            payload = json.dumps(result, ensure_ascii=False).encode()
+        except (TypeError, ValueError):
+            return  # not serializable, so it could not be replayed faithfully
+        if len(payload) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = payload
+            self._size += len(payload)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries), "bytes": self._size}
@@ -0,0 +1,128 @@
+import json
+from typing import Any, Dict, List
+
+from .message import MessageType
+
+# chars per token of English text and JSON, close enough for budgeting
+_CHARS_PER_TOKEN = 4
+# per-message framing the API adds around role and content
+_MESSAGE_OVERHEAD_TOKENS = 4
+# tool results of earlier turns only need to remind the model what was found
+_STALE_RESULT_TOKENS = 256
+_OMITTED_RESULT = "[omitted to fit the context budget]"
+_SHRINK_ROUNDS = 8
+
+
+def estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Rough prompt size of ``messages``, without a tokenizer."""
+    return sum(_message_tokens(msg) for msg in messages)
+
+
+class ContextBudgetError(ValueError):
+    """The prompt does not fit the token ceiling even without its tool results."""
+
+
+class ContextWindow:
+    """Keeps the prompt of every LLM call within a token budget.
+
+    The history the agent keeps (and the UI renders) is never changed; only
+    the copy sent with each request is compacted. A turn starts at a
+    user-facing user message. In earlier turns the THINKING messages are
+    dropped, as they only led to answers that are already in the history, and
+    tool results are cut to a short excerpt. Tool results of the current turn
+    are cut to ``tool_result_tokens``, and if the current turn alone is over
+    ``max_tokens``, further, each in proportion to its size, only as far as
+    needed. Whole earlier turns are then dropped, oldest first, while the
+    prompt is over ``max_tokens``, so an assistant tool call is never
+    separated from its results. A prompt that cannot fit even then raises
+    ``ContextBudgetError`` rather than being sent over budget.
+    """
+
+    def __init__(self, max_tokens: int, tool_result_tokens: int) -> None:
+        self.max_tokens = max_tokens
+        self.tool_result_tokens = tool_result_tokens
+
+    def fit(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        turn_starts = [i for i, msg in enumerate(messages) if _is_user_turn(msg)]
+        if not turn_starts:
+            prompt = [_truncate_result(msg, self.tool_result_tokens) for msg in messages]
+            return self._checked(_shrink_results(prompt, self.max_tokens))
+
+        preamble = messages[:turn_starts[0]]
+        earlier = [
+            [
+                _truncate_result(msg, _STALE_RESULT_TOKENS)
+                for msg in messages[start:end]
+                if _message_type(msg) != MessageType.THINKING
+            ]
+            for start, end in zip(turn_starts, turn_starts[1:])
+        ]
+        current = [_truncate_result(msg, self.tool_result_tokens) for msg in messages[turn_starts[-1]:]]
+        current = _shrink_results(current, self.max_tokens - estimate_tokens(preamble))
+
+        fixed = estimate_tokens(preamble) + estimate_tokens(current)
+        sizes = [estimate_tokens(turn) for turn in earlier]
+        while earlier and fixed + sum(sizes) > self.max_tokens:
+            earlier.pop(0)
+            sizes.pop(0)
+
+        return self._checked(preamble + [msg for turn in earlier for msg in turn] + current)
+
+    def _checked(self, prompt: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        size = estimate_tokens(prompt)
+        if size > self.max_tokens:
+            raise ContextBudgetError(
+                f"The prompt needs about {size} tokens even without its tool results, over the "
+                f"ceiling of {self.max_tokens} (BITEXT_CONTEXT_MAX_TOKENS)"
+            )
+        return prompt
+
+
+def _shrink_results(messages: List[Dict[str, Any]], budget: int) -> List[Dict[str, Any]]:
+    """Cut the tool results in ``messages``, each in proportion to its size, until they fit ``budget`` tokens."""
+    results = [i for i, msg in enumerate(messages) if msg.get("role") == "tool"]
+    excess = estimate_tokens(messages) - budget
+    if excess <= 0 or not results:
+        return messages
+
+    sizes = {i: len(messages[i].get("content") or "") // _CHARS_PER_TOKEN for i in results}
+    total = sum(sizes.values())
+    shrunk = list(messages)
+    keep = 1.0
+    # the truncation notes add a little, so a few rounds may be needed; the last one omits every result
+    for _ in range(_SHRINK_ROUNDS):
+        keep = max(0.0, keep - excess / max(total, 1))
+        for i in results:
+            tokens = int(sizes[i] * keep)
+            shrunk[i] = _truncate_result(messages[i], tokens) if tokens else {**messages[i], "content": _OMITTED_RESULT}
+        excess = estimate_tokens(shrunk) - budget
+        if excess <= 0 or keep == 0.0:
+            break
+    return shrunk
+
+
+def _message_tokens(msg: Dict[str, Any]) -> int:
+    chars = len(str(msg.get("content") or ""))
+    if msg.get("tool_calls"):
+        chars += len(json.dumps(msg["tool_calls"]))
+    return chars // _CHARS_PER_TOKEN + _MESSAGE_OVERHEAD_TOKENS
+
+
+def _message_type(msg: Dict[str, Any]) -> MessageType | None:
+    message_type = msg.get("message_type")
+    return MessageType(message_type) if message_type is not None else None
+
+
+def _is_user_turn(msg: Dict[str, Any]) -> bool:
+    # prompts rewritten into user messages carry no message type and start no turn
+    return msg.get("role") == "user" and _message_type(msg) == MessageType.USER_FACING
+
+
+def _truncate_result(msg: Dict[str, Any], max_tokens: int) -> Dict[str, Any]:
+    if msg.get("role") != "tool":
+        return msg
+    content = msg.get("content") or ""
+    max_chars = max_tokens * _CHARS_PER_TOKEN
+    if len(content) <= max_chars:
+        return msg
+    return {**msg, "content": f"{content[:max_chars]}... [truncated {len(content) - max_chars} of {len(content)} characters]"}
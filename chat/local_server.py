@@ -0,0 +1,254 @@
+"""OpenAI-compatible stand-in for the chat-completions endpoint, for offline runs.
+
+Run from the project root:
+
+    python -m chat.local_server --port 8765 --latency 0.5 --cassettes .bitext_cache/llm_cassettes
+
+then point the agent at it with ``BITEXT_LLM_BACKEND=local`` (and
+``BITEXT_LLM_BASE_URL`` if it is not on ``http://127.0.0.1:8765/v1``).
+
+``POST /v1/chat/completions`` is answered, plain or streamed, with the
+recorded completion for the same request (see ``chat.replay``) if there is one,
+otherwise with the first matching rule of the script. The built-in script
+drives every agent mode through one ``dataset_info`` call to a
+final answer; ``--script`` replaces it with a JSON list of rules, each with
+optional conditions and a response::
+
+    {"response_format": "ScopeCheck",      # structured-output name, or null for plain calls
+     "tools": true,                        # whether the request offers tools
+     "after_tool": false,                  # whether the conversation already has a tool result
+     "match": "refund",                    # substring of the last message
+     "content": {...} or "text",           # objects are sent as JSON
+     "tool_calls": [{"name": "dataset_info", "arguments": {}}]}
+
+``--latency`` delays every response and ``--chunk-delay`` every streamed chunk,
+so runs can model the latency of the real API deterministically. Scripted
+responses report ``usage.prompt_tokens_details.cached_tokens`` for the longest
+message prefix seen in an earlier request, like the provider's prompt cache.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List
+
+from chat.replay import Cassette, request_key
+
+
+_STREAM_CHUNK_CHARS = 16
+# like the real API, only prompts from this size up are cached, in blocks of this size
+_CACHE_MIN_TOKENS = 1024
+_CACHE_BLOCK_TOKENS = 128
+
+_DEFAULT_SCRIPT: List[Dict[str, Any]] = [
+    {"response_format": "ScopeCheck", "content": {"reasoning": "Asks about the dataset.", "scope": "In Scope"}},
+    {"response_format": "ReactiveThinkingStep", "after_tool": False, "content": {
+        "reasoning": "I need the dataset overview first.", "use_tool": True,
+        "next_step": "Call dataset_info to get the dataset overview.", "message_type": "thinking"}},
+    {"response_format": "ReactiveThinkingStep", "after_tool": True, "content": {
+        "reasoning": "The tool result answers the question.", "use_tool": False,
+        "next_step": "Summarize the dataset overview for the user.", "message_type": "thinking"}},
+    {"response_format": "FusedThinkingStep", "after_tool": False, "content": {
+        "reasoning": "I need the dataset overview first.", "next_step": "Call dataset_info.",
+        "tool_calls": [{"name": "dataset_info", "arguments": "{}"}], "answer": "", "message_type": "thinking"}},
+    {"response_format": "FusedThinkingStep", "after_tool": True, "content": {
+        "reasoning": "The tool result answers the question.", "next_step": "Answer from the dataset overview.",
+        "tool_calls": [], "message_type": "thinking",
+        "answer": "The dataset contains customer support conversations grouped by category and intent."}},
+    {"response_format": "PlanningThinking", "content": {
+        "goal": "Describe the dataset.",
+        "steps": [{"reasoning": "The overview has the needed numbers.", "action": "Use the dataset_info tool",
+                   "expected_result": "Dataset overview", "depends_on": []}]}},
+    {"response_format": "FinalResponse", "content": {
+        "content": "The dataset contains customer support conversations grouped by category and intent.",
+        "reasoning": "Summarized from the dataset_info tool result.", "message_type": "user_facing"}},
+    {"response_format": None, "tools": True, "tool_calls": [{"name": "dataset_info", "arguments": {}}]},
+    {"content": "OK."},
+]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    script: List[Dict[str, Any]] = _DEFAULT_SCRIPT
+    recordings: Dict[str, Dict[str, Any]] = {}
+    latency: float = 0.0
+    chunk_delay: float = 0.0
+    prefixes: set = set()
+    _prefix_lock = threading.Lock()
+    _ids = itertools.count(1)
+
+    def do_POST(self) -> None:
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown endpoint {self.path}"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+
+        completion = self._completion(body)
+        if completion is None:
+            self._send_json(404, {"error": {"message": "No recorded or scripted response matches this request"}})
+            return
+
+        time.sleep(self.latency)
+        if body.get("stream"):
+            self._send_stream(completion, body)
+        else:
+            self._send_json(200, completion)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass  # one line per request would drown the agent's own output
+
+    def _completion(self, body: Dict[str, Any]) -> Dict[str, Any] | None:
+        response_format = (body.get("response_format") or {}).get("json_schema", {}).get("name")
+        key = request_key(body["model"], body["messages"], body.get("tools"), body.get("tool_choice"), response_format)
+        if key in self.recordings:
+            completion = json.loads(json.dumps(self.recordings[key]))
+            for choice in completion["choices"]:
+                # clients parse structured output from the content themselves
+                choice["message"].pop("parsed", None)
+            return completion
+
+        rule = next((rule for rule in self.script if _matches(rule, body, response_format)), None)
+        if rule is None:
+            return None
+        content = rule.get("content")
+        tool_calls = [
+            {
+                "id": f"call_{next(self._ids)}",
+                "type": "function",
+                "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))},
+            }
+            for call in rule.get("tool_calls", [])
+        ]
+        message = {
+            "role": "assistant",
+            "content": content if content is None or isinstance(content, str) else json.dumps(content),
+            "tool_calls": tool_calls or None,
+        }
+        prompt_tokens = len(json.dumps(body["messages"])) // 4
+        completion_tokens = len(json.dumps(message)) // 4
+        cached_tokens = self._cached_tokens(body)
+        return {
+            "id": f"chatcmpl-local-{next(self._ids)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "tool_calls" if tool_calls else "stop", "message": message}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }
+
+    def _cached_tokens(self, body: Dict[str, Any]) -> int:
+        """Tokens of the longest message prefix an earlier request already sent.
+
+        A stand-in for the provider's prompt cache, at whole-message granularity.
+        """
+        digest = hashlib.sha256(json.dumps([body["model"], body.get("tools")]).encode())
+        cached = 0
+        with self._prefix_lock:
+            for k, msg in enumerate(body["messages"], start=1):
+                digest.update(json.dumps(msg, sort_keys=True).encode())
+                key = digest.hexdigest()
+                if key in self.prefixes:
+                    cached = len(json.dumps(body["messages"][:k])) // 4
+                self.prefixes.add(key)
+        if cached < _CACHE_MIN_TOKENS:
+            return 0
+        return cached - cached % _CACHE_BLOCK_TOKENS
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, completion: Dict[str, Any], body: Dict[str, Any]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+
+        message = completion["choices"][0]["message"]
+        content = message.get("content") or ""
+        deltas = [{"role": "assistant", "content": ""}]
+        deltas += [{"content": content[i:i + _STREAM_CHUNK_CHARS]} for i in range(0, len(content), _STREAM_CHUNK_CHARS)]
+        if message.get("tool_calls"):
+            deltas.append({"tool_calls": [{"index": i, **call} for i, call in enumerate(message["tool_calls"])]})
+
+        def chunk(delta: Dict[str, Any], finish_reason: str | None = None, **extra: Any) -> Dict[str, Any]:
+            return {
+                "id": completion["id"],
+                "object": "chat.completion.chunk",
+                "created": completion["created"],
+                "model": completion["model"],
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                **extra,
+            }
+
+        events = [chunk(delta) for delta in deltas]
+        events.append(chunk({}, completion["choices"][0]["finish_reason"]))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            events.append({**chunk({}), "choices": [], "usage": completion.get("usage")})
+        for event in events:
+            self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.chunk_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def _matches(rule: Dict[str, Any], body: Dict[str, Any], response_format: str | None) -> bool:
+    if "response_format" in rule and rule["response_format"] != response_format:
+        return False
+    if "tools" in rule and rule["tools"] != bool(body.get("tools")):
+        return False
+    if "after_tool" in rule and rule["after_tool"] != any(msg.get("role") == "tool" for msg in body["messages"]):
+        return False
+    if "match" in rule and rule["match"] not in str(body["messages"][-1].get("content", "")):
+        return False
+    return True
+
+
+def serve(
+    port: int = 8765,
+    latency: float = 0.0,
+    chunk_delay: float = 0.0,
+    script: List[Dict[str, Any]] | None = None,
+    cassettes: Path | None = None,
+) -> ThreadingHTTPServer:
+    """Create the server; call ``serve_forever()`` on it (e.g. in a thread) to start answering."""
+    handler = type("Handler", (_Handler,), {
+        "script": script if script is not None else _DEFAULT_SCRIPT,
+        "recordings": Cassette(cassettes).responses() if cassettes is not None else {},
+        "latency": latency,
+        "chunk_delay": chunk_delay,
+        "prefixes": set(),
+    })
+    return ThreadingHTTPServer(("127.0.0.1", port), handler)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before every response")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--script", type=Path, default=None, help="JSON list of scripted rules")
+    parser.add_argument("--cassettes", type=Path, default=None, help="directory of recorded completions to replay")
+    args = parser.parse_args()
+
+    script = json.loads(args.script.read_text()) if args.script is not None else None
+    server = serve(args.port, args.latency, args.chunk_delay, script, args.cassettes)
+    print(f"Serving chat completions on http://127.0.0.1:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
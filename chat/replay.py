@@ -0,0 +1,63 @@
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+from openai.types.chat import ChatCompletion, ParsedChatCompletion
+from pydantic import BaseModel
+
+from bitext import storage
+
+
+def request_key(
+    model: str,
+    messages: List[Dict[str, Any]],
+    tools: List[Dict[str, Any]] | None = None,
+    tool_choice: str | None = None,
+    response_format: str | None = None,
+) -> str:
+    """Content address of a chat-completions request.
+
+    ``response_format`` is the structured-output name, which is what the
+    request carries on the wire, so the stand-in server (``chat.local_server``)
+    derives the same key from the raw request body as ``Service`` does from its
+    arguments. Streaming is deliberately not part of the key: a streamed and a
+    plain call for the same prompt share one recording.
+    """
+    payload = {
+        "model": model,
+        "messages": messages,
+        "tools": tools,
+        "tool_choice": tool_choice,
+        "response_format": response_format,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode()).hexdigest()
+
+
+class Cassette:
+    """Directory of recorded completions, one ``<request key>.json`` file each."""
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def load(self, key: str, response_format: type[BaseModel] | None = None) -> ChatCompletion | None:
+        """The recorded completion, typed like the live one (``ParsedChatCompletion`` for ``parse``)."""
+        path = self.directory / f"{key}.json"
+        if not path.exists():
+            return None
+        response = json.loads(path.read_text())["response"]
+        if response_format is None:
+            return ChatCompletion.model_validate(response)
+        return ParsedChatCompletion[response_format].model_validate(response)
+
+    def save(self, key: str, request: Dict[str, Any], completion: ChatCompletion) -> None:
+        path = self.directory / f"{key}.json"
+        storage.write_text(path, json.dumps({"request": request, "response": completion.model_dump(mode="json")}, indent=2))
+
+    def responses(self) -> Dict[str, Dict[str, Any]]:
+        """Every recorded response by request key, as plain JSON."""
+        return {
+            path.stem: json.loads(path.read_text())["response"]
+            for path in self.directory.glob("*.json")
+        }
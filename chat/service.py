@@ -1,14 +1,52 @@
+import asyncio
+import os
+from pathlib import Path
+import jiter
 import openai
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, List, Tuple
 from pydantic import BaseModel
+from .context import ContextWindow, estimate_tokens
 from .message import MessageType
+from .replay import Cassette, request_key
+
+# "openai" calls the live API; "record" answers from recorded completions and
+# records the ones it is missing; "replay" only answers from recordings and
+# never touches the network; "local" talks to the stand-in server (chat.local_server)
+_BACKENDS = ("openai", "record", "replay", "local")
+_DEFAULT_BACKEND = os.environ.get("BITEXT_LLM_BACKEND", "openai")
+_CASSETTE_DIR = Path(os.environ.get("BITEXT_LLM_CASSETTE_DIR", ".bitext_cache/llm_cassettes"))
+_LOCAL_BASE_URL = os.environ.get("BITEXT_LLM_BASE_URL", "http://127.0.0.1:8765/v1")
+# token ceiling of every prompt, and of each tool result in it; see chat.context
+_CONTEXT_MAX_TOKENS = int(os.environ.get("BITEXT_CONTEXT_MAX_TOKENS", "24000"))
+_CONTEXT_TOOL_RESULT_TOKENS = int(os.environ.get("BITEXT_CONTEXT_TOOL_RESULT_TOKENS", "2000"))
+
+# receives {"prompt_tokens", "cached_tokens", "completion_tokens", "cached_ratio"} after every call
+UsageSink = Callable[[Dict[str, Any]], None]
 
 class Service:
     """Service for interacting with OpenAI chat completions API."""
     
-    def __init__(self, model: str):
+    def __init__(self, model: str, backend: str | None = None, on_usage: UsageSink | None = None):
+        backend = backend or _DEFAULT_BACKEND
+        if backend not in _BACKENDS:
+            raise ValueError(f"Unknown LLM backend: {backend!r}. Use one of {list(_BACKENDS)}")
         self._model = model
-        self._client = openai.OpenAI()
+        self._backend = backend
+        if backend == "local":
+            self._client_kwargs = {"base_url": _LOCAL_BASE_URL, "api_key": "local"}
+        elif backend == "replay":
+            # replay never sends a request, so it must not require a real key
+            self._client_kwargs = {"api_key": os.environ.get("OPENAI_API_KEY") or "replay"}
+        else:
+            self._client_kwargs = {}
+        self._cassette = Cassette(_CASSETTE_DIR) if backend in ("record", "replay") else None
+        self._client = openai.OpenAI(**self._client_kwargs)
+        self._async_client: openai.AsyncOpenAI | None = None
+        self._async_loop: asyncio.AbstractEventLoop | None = None
+        self._context = ContextWindow(_CONTEXT_MAX_TOKENS, _CONTEXT_TOOL_RESULT_TOKENS)
+        # running totals over every call this service made
+        self.usage = {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+        self._on_usage = on_usage
 
     def chat(
         self,
@@ -16,6 +54,124 @@ class Service:
         tools_json: List[Dict[str, Any]] | None = None,
         response_format: type[BaseModel] | None = None,
     ):
+        kwargs = self._request(messages, tools_json, response_format)
+        key, recorded = self._lookup(kwargs, response_format)
+        if recorded is not None:
+            return self._report_usage(kwargs, recorded)
+        if response_format:
+            completion = self._client.beta.chat.completions.parse(**kwargs)
+        else:
+            completion = self._client.chat.completions.create(**kwargs)
+        return self._record(key, kwargs, completion)
+
+    async def achat(
+        self,
+        messages: List[Dict[str, str | Dict[str, Any]]],
+        tools_json: List[Dict[str, Any]] | None = None,
+        response_format: type[BaseModel] | None = None,
+    ):
+        """Same as ``chat``, but awaits the response instead of blocking the thread."""
+        kwargs = self._request(messages, tools_json, response_format)
+        key, recorded = self._lookup(kwargs, response_format)
+        if recorded is not None:
+            return self._report_usage(kwargs, recorded)
+        client = self._get_async_client()
+        if response_format:
+            completion = await client.beta.chat.completions.parse(**kwargs)
+        else:
+            completion = await client.chat.completions.create(**kwargs)
+        return self._record(key, kwargs, completion)
+
+    async def astream(
+        self,
+        messages: List[Dict[str, str | Dict[str, Any]]],
+        tools_json: List[Dict[str, Any]] | None = None,
+        response_format: type[BaseModel] | None = None,
+        on_delta: Callable[[str, Any], None] | None = None,
+    ):
+        """Same as ``achat``, but streamed: ``on_delta(snapshot, parsed)`` is called
+        for every content chunk with the text so far and, with a ``response_format``,
+        the partially parsed object (a dict). Returns the complete response,
+        shaped like the one ``achat`` returns.
+        """
+        kwargs = self._request(messages, tools_json, response_format)
+        key, recorded = self._lookup(kwargs, response_format)
+        if recorded is not None:
+            # a recording arrives all at once, as a single chunk
+            message = recorded.choices[0].message
+            if message.content and on_delta is not None:
+                parsed = getattr(message, "parsed", None)
+                on_delta(message.content, parsed.model_dump() if parsed is not None else None)
+            return self._report_usage(kwargs, recorded)
+        stream_kwargs = {**kwargs, "stream_options": {"include_usage": True}}
+        async with self._get_async_client().beta.chat.completions.stream(**stream_kwargs) as stream:
+            async for event in stream:
+                if event.type == "content.delta" and on_delta is not None:
+                    on_delta(event.snapshot, _partial_json(event.snapshot) if response_format else None)
+            completion = await stream.get_final_completion()
+        return self._record(key, kwargs, completion)
+
+    def _lookup(self, kwargs: Dict[str, Any], response_format: type[BaseModel] | None) -> Tuple[str | None, Any]:
+        """Request key and recorded completion, if the backend replays recordings."""
+        if self._cassette is None:
+            return None, None
+        key = request_key(
+            kwargs["model"],
+            kwargs["messages"],
+            kwargs.get("tools"),
+            kwargs.get("tool_choice"),
+            response_format.__name__ if response_format else None,
+        )
+        recorded = self._cassette.load(key, response_format)
+        if recorded is None and self._backend == "replay":
+            raise LookupError(f"No recorded completion for request {key} in {self._cassette.directory}")
+        return key, recorded
+
+    def _record(self, key: str | None, kwargs: Dict[str, Any], completion):
+        if key is not None:
+            request = {k: v for k, v in kwargs.items() if k != "response_format"}
+            self._cassette.save(key, request, completion)
+        return self._report_usage(kwargs, completion)
+
+    def _report_usage(self, kwargs: Dict[str, Any], completion):
+        """Print and total the prompt size of a call, and how much of it the provider served from its prompt cache."""
+        usage = getattr(completion, "usage", None)
+        prompt_tokens = usage.prompt_tokens if usage is not None else estimate_tokens(kwargs["messages"])
+        completion_tokens = usage.completion_tokens if usage is not None else 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+        cached_ratio = cached_tokens / prompt_tokens if prompt_tokens else 0.0
+
+        self.usage["calls"] += 1
+        self.usage["prompt_tokens"] += prompt_tokens
+        self.usage["cached_tokens"] += cached_tokens
+        self.usage["completion_tokens"] += completion_tokens
+        print(f"   📏 Prompt: {prompt_tokens} tokens in {len(kwargs['messages'])} messages"
+              f"{'' if usage is not None else ' (estimated)'}, {cached_ratio:.0%} cached")
+        if self._on_usage is not None:
+            self._on_usage({
+                "prompt_tokens": prompt_tokens,
+                "cached_tokens": cached_tokens,
+                "completion_tokens": completion_tokens,
+                "cached_ratio": cached_ratio,
+            })
+        return completion
+
+    def _get_async_client(self) -> openai.AsyncOpenAI:
+        # the async client's connection pool belongs to the event loop it was
+        # first used on, so each loop gets its own client
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._async_client = openai.AsyncOpenAI(**self._client_kwargs)
+            self._async_loop = loop
+        return self._async_client
+
+    def _request(
+        self,
+        messages: List[Dict[str, str | Dict[str, Any]]],
+        tools_json: List[Dict[str, Any]] | None,
+        response_format: type[BaseModel] | None,
+    ) -> Dict[str, Any]:
         # Convert any MessageType enums to strings in the messages
         def convert_message_types(msg: Dict) -> Dict:
             if isinstance(msg, dict):
@@ -25,14 +181,14 @@ class Service:
                 }
             return msg
 
-        messages = [convert_message_types(msg) for msg in messages]
+        messages = [convert_message_types(msg) for msg in self._context.fit(messages)]
 
         if response_format:
-            return self._client.beta.chat.completions.parse(
-                model=self._model,
-                messages=messages,
-                response_format=response_format
-            )
+            return {
+                "model": self._model,
+                "messages": messages,
+                "response_format": response_format
+            }
 
         kwargs = {
             "model": self._model,
@@ -42,4 +198,16 @@ class Service:
             kwargs["tools"] = tools_json
             kwargs["tool_choice"] = "auto"
 
-        return self._client.chat.completions.create(**kwargs)
\ No newline at end of file
+        return kwargs
+
+
+def _partial_json(snapshot: str) -> Any:
+    """Parse the JSON received so far, keeping a string that is still open.
+
+    The streaming helper's own partial parse drops a string until it is
+    closed, which would hold back a field's text until it is complete.
+    """
+    try:
+        return jiter.from_json(snapshot.encode(), partial_mode="trailing-strings")
+    except ValueError:
+        return None
@@ -0,0 +1,35 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
+
+def run_sync(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion from synchronous code and return its result.
+
+    Coroutines run on one long-lived event loop in a background thread rather
+    than a fresh ``asyncio.run`` loop per call: the async OpenAI clients keep
+    pooled connections bound to their loop, so reusing the loop keeps them
+    alive between calls. It also works when the caller is itself inside a
+    running loop (e.g. a notebook), where ``asyncio.run`` is not allowed.
+    """
+    return submit(coro).result()
+
+
+def submit(coro: Coroutine[Any, Any, T]) -> concurrent.futures.Future[T]:
+    """Start a coroutine on the shared background loop without waiting for it."""
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop())
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="sync-bridge", daemon=True).start()
+        return _loop
@@ -1,6 +1,7 @@
-from chat.service import Service as ChatService
+from chat.service import Service as ChatService, UsageSink
 from typing import List, Dict
 from chat.message import MessageType
+from chat.sync import run_sync
 from .scope import ScopeCheck
 
 _system_prompt = (
@@ -54,11 +55,14 @@ class Checker:
     while questions about customer service categories or dataset analysis would be in scope.
     """
 
-    def __init__(self, model: str):
+    def __init__(self, model: str, llm_backend: str | None = None, on_usage: UsageSink | None = None):
         self._model = model
-        self._llm = ChatService(model)
+        self._llm = ChatService(model, llm_backend, on_usage)
 
     def check(self, user_message: str, chat_history: List[Dict[str, str]] | None = None) -> ScopeCheck:
+        return run_sync(self.acheck(user_message, chat_history))
+
+    async def acheck(self, user_message: str, chat_history: List[Dict[str, str]] | None = None) -> ScopeCheck:
 
         # filter chat history to only include user-facing messages
         relevant_context = []
@@ -77,7 +81,7 @@ class Checker:
             if context:
                 user_message = f"Previous conversation:\n{context}\n\nCurrent message:\n{user_message}"
 
-        response = self._llm.chat(
+        response = await self._llm.achat(
             messages=[
                 {"role": "system", "content": _system_prompt},
                 {"role": "user", "content": user_message}
@@ -0,0 +1,58 @@
+"""The tools answer from positional views of the shared frame and must never modify it."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from bitext.datastore import _store
+from tools.aggregator import aggregator
+from tools.data_slicer import data_slicer
+from tools.exact_search import exact_search
+from tools.find_common_questions import _find_common_questions
+from tools.lexical_search import lexical_search
+from tools.semantic_search import semantic_search
+
+
+def _fingerprint(df: pd.DataFrame):
+    return (
+        list(df.columns),
+        [str(dtype) for dtype in df.dtypes],
+        {col: list(df[col].cat.categories) for col in df.select_dtypes("category")},
+        pd.util.hash_pandas_object(df, index=True).to_numpy().copy(),
+    )
+
+
+_CALLS = [
+    (data_slicer, {"filter": {"category": "ACCOUNT"}, "sort_by": {"intent": False}, "limit": 5}),
+    (data_slicer, {"filter": {"intent": ["cancel_order", "track_order"]}, "group_by": ["category", "intent"]}),
+    (data_slicer, {"sort_by": "instruction", "limit": 5, "random_sample": True}),
+    (aggregator, {"group_by": "category", "metrics": ["count", "percentage", "text_stats"], "sort_by": "count"}),
+    (aggregator, {"group_by": ["category", "intent"], "filters": {"category": ["ACCOUNT", "REFUND"]}, "limit": 5}),
+    # the uncached body, so a result cached by an earlier run cannot hide a mutation
+    (_find_common_questions, {"filter": {"category": "REFUND"}, "text_field": "instruction", "n": 3}),
+    (semantic_search, {"text": "I want my money back", "k": 5, "filter": {"category": "REFUND"}}),
+    (semantic_search, {"text": "cancel my order", "k": 5, "field": "response"}),
+    (exact_search, {"text": "order", "column": "instruction", "k": 5}),
+    (lexical_search, {"text": "refund order", "k": 5, "filter": {"category": ["REFUND", "ORDER"]}}),
+    (lexical_search, {"text": "password account", "k": 5, "mode": "hybrid", "field": "instruction"}),
+]
+
+
+@pytest.mark.parametrize("tool, kwargs", _CALLS, ids=lambda value: getattr(value, "__name__", ""))
+def test_tool_leaves_store_unchanged(tool, kwargs):
+    before = _fingerprint(_store.df)
+    tool(**kwargs)
+    after = _fingerprint(_store.df)
+
+    assert after[:3] == before[:3]
+    np.testing.assert_array_equal(after[3], before[3])
+
+
+def test_editing_a_result_leaves_store_unchanged():
+    before = _fingerprint(_store.df)
+    result = data_slicer(filter={"category": "ACCOUNT"}, limit=5)
+    result["instruction"] = "edited"
+    result.drop(columns=["response"], inplace=True)
+    after = _fingerprint(_store.df)
+
+    assert after[:3] == before[:3]
+    np.testing.assert_array_equal(after[3], before[3])
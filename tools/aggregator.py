@@ -1,9 +1,40 @@
 from typing import Dict, Any, List, Union
+import numpy as np
 import pandas as pd
 
-from bitext.datastore import _store
+from bitext.datastore import _store, _TEXT_COLS
+
+_TOP_WORDS = 5
+# above this many (group, token) slots the dense count array (8 bytes a slot,
+# per concurrent call) costs more than sorting the pairs
+_DENSE_COUNT_SLOTS = 1 << 22
+
+
+def _common_words(col: str, row_group: np.ndarray, n_groups: int) -> List[Dict[str, int]]:
+    """Top words per group from one count over every (group, token) pair."""
+    tokens = _store.tokens[col]
+    groups = row_group[tokens["rows"]]
+    selected = groups >= 0
+    n_vocab = len(tokens["vocab"])
+    pairs = groups[selected] * n_vocab + tokens["codes"][selected]
+    if n_groups * n_vocab <= _DENSE_COUNT_SLOTS:
+        counts = np.bincount(pairs, minlength=n_groups * n_vocab)
+        pairs = np.flatnonzero(counts)
+        counts = counts[pairs]
+    else:
+        pairs, counts = np.unique(pairs, return_counts=True)
+    pair_groups, pair_tokens = np.divmod(pairs, n_vocab)
+
+    # most frequent first within each group; ties go to the word seen first in the data
+    order = np.lexsort((pair_tokens, -counts, pair_groups))
+    pair_groups, pair_tokens, counts = pair_groups[order], pair_tokens[order], counts[order]
+    rank = np.arange(len(order)) - np.searchsorted(pair_groups, pair_groups)
+
+    common = [{} for _ in range(n_groups)]
+    for g, t, c in zip(pair_groups[rank < _TOP_WORDS], pair_tokens[rank < _TOP_WORDS], counts[rank < _TOP_WORDS]):
+        common[g][tokens["vocab"][t]] = int(c)
+    return common
 
-_df = _store.df
 
 def aggregator(
     group_by: str | List[str],
@@ -31,50 +62,63 @@ def aggregator(
         - results: The aggregated data
         - metadata: Information about the aggregation
     """
-    df = _df.copy()
-    
-    # Apply filters if any
-    if filters:
-        for col, val in filters.items():
-            df = df[df[col] == val]
-    
     # Handle group_by
     if isinstance(group_by, str):
         group_by = [group_by]
     
-    # Perform aggregation
+    # Materialize only the filtered rows and the columns the metrics read;
+    # "unique" looks at every column, text stats come from precomputed features
+    rows = _store.filter_rows(filters) if filters else np.arange(len(_store.df))
+    columns = None if "unique" in metrics else group_by
+    df = _store.view(rows, columns)
+    
+    # One groupby for every metric; ngroup maps each row to its group (-1 for missing keys)
+    groups = df.groupby(group_by, observed=True, sort=True)
+    sizes = groups.size()
+    row_group = np.full(len(_store.df), -1)
+    row_group[rows] = groups.ngroup().to_numpy()
+    
+    unique = None
+    if "unique" in metrics:
+        unique = groups[[col for col in df.columns if col not in group_by]].nunique()
+    
+    text_stats = {}
+    if "text_stats" in metrics:
+        for col in _TEXT_COLS:
+            if col in _store.df.columns:
+                features = pd.DataFrame({
+                    "avg_length": _store.features[f"{col}_length"].to_numpy(dtype=float, na_value=np.nan)[rows],
+                    "word_count": _store.features[f"{col}_words"].to_numpy(dtype=float, na_value=np.nan)[rows],
+                })
+                means = features.groupby(row_group[rows]).agg("mean")
+                text_stats[col] = (means, _common_words(col, row_group, len(sizes)))
+    
     results = []
-    for group in df.groupby(group_by):
+    for i, (key, size) in enumerate(sizes.items()):
         group_data = {
-            "group": dict(zip(group_by, group[0])),
+            "group": dict(zip(group_by, key if isinstance(key, tuple) else (key,))),
             "metrics": {}
         }
         
-        group_df = group[1]
-        
         # Calculate requested metrics
         if "count" in metrics:
-            group_data["metrics"]["count"] = len(group_df)
+            group_data["metrics"]["count"] = int(size)
         
         if "percentage" in metrics:
-            group_data["metrics"]["percentage"] = len(group_df) / len(df) * 100
+            group_data["metrics"]["percentage"] = size / len(df) * 100
         
-        if "unique" in metrics:
-            for col in df.columns:
-                if col not in group_by:
-                    group_data["metrics"][f"unique_{col}"] = group_df[col].nunique()
+        if unique is not None:
+            for col in unique.columns:
+                group_data["metrics"][f"unique_{col}"] = int(unique.iat[i, unique.columns.get_loc(col)])
         
-        if "text_stats" in metrics:
-            for col in ["instruction", "response"]:
-                if col in df.columns:
-                    group_data["metrics"][f"{col}_stats"] = {
-                        "avg_length": group_df[col].str.len().mean(),
-                        "word_count": group_df[col].str.split().str.len().mean(),
-                        "common_words": group_df[col].str.split().explode().value_counts().head(5).to_dict()
-                    }
+        for col, (means, common) in text_stats.items():
+            group_data["metrics"][f"{col}_stats"] = {
+                "avg_length": float(means.at[i, "avg_length"]),
+                "word_count": float(means.at[i, "word_count"]),
+                "common_words": common[i]
+            }
         
         results.append(group_data)
-    
     # Sort results if requested
     if sort_by:
         results.sort(key=lambda x: x["metrics"].get(sort_by, 0), reverse=True)
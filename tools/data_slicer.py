@@ -1,4 +1,5 @@
 from typing import Dict, Any, List, Union
+import numpy as np
 import pandas as pd
 
 from bitext.datastore import _store
@@ -35,21 +36,8 @@ def data_slicer(
     Raises:
         ValueError: If invalid column names are provided in filter, group_by, or sort_by
     """
-    df = _df.copy()
-    
-    # Apply filters if specified
-    if filter is not None:
-        # Validate filter keys
-        invalid_keys = [key for key in filter.keys() if key not in df.columns]
-        if invalid_keys:
-            raise ValueError(f"Invalid filter keys: {invalid_keys}. Available columns: {df.columns.tolist()}")
-        
-        # Apply each filter condition
-        for col, val in filter.items():
-            if isinstance(val, list):
-                df = df[df[col].isin(val)]
-            else:
-                df = df[df[col] == val]
+    # Work on row positions into the shared frame; only the final rows are materialized
+    rows = _store.filter_rows(filter) if filter is not None else np.arange(len(_df))
     
     # Apply grouping if specified
     if group_by is not None:
@@ -58,37 +46,40 @@ def data_slicer(
             group_by = [group_by]
             
         # Validate group_by columns
-        invalid_cols = [col for col in group_by if col not in df.columns]
+        invalid_cols = [col for col in group_by if col not in _df.columns]
         if invalid_cols:
-            raise ValueError(f"Invalid group_by columns: {invalid_cols}. Available columns: {df.columns.tolist()}")
+            raise ValueError(f"Invalid group_by columns: {invalid_cols}. Available columns: {_df.columns.tolist()}")
             
-        df = df.groupby(group_by).apply(lambda x: x).reset_index(drop=True)
+        # Rows come back group after group, like groupby, which also drops missing keys
+        keys = _store.view(rows, group_by).reset_index(drop=True)
+        keys = keys[keys.notna().all(axis=1).to_numpy()]
+        rows = rows[keys.sort_values(group_by, kind="stable").index.to_numpy()]
     
     # Apply sorting if specified
     if sort_by is not None:
-        if isinstance(sort_by, str):
-            if sort_by not in df.columns:
-                raise ValueError(f"Invalid sort_by column: {sort_by}. Available columns: {df.columns.tolist()}")
-            df = df.sort_values(sort_by)
-        elif isinstance(sort_by, dict):
-            col, ascending = next(iter(sort_by.items()))
-            if col not in df.columns:
-                raise ValueError(f"Invalid sort_by column: {col}. Available columns: {df.columns.tolist()}")
-            df = df.sort_values(col, ascending=ascending)
+        col, ascending = (sort_by, True) if isinstance(sort_by, str) else next(iter(sort_by.items()))
+        if col not in _df.columns:
+            raise ValueError(f"Invalid sort_by column: {col}. Available columns: {_df.columns.tolist()}")
+        values = _store.view(rows, [col]).reset_index(drop=True)
+        rows = rows[values.sort_values(col, ascending=ascending, kind="stable").index.to_numpy()]
     
     # Apply sampling if limit is specified
     if limit is not None:
         if random_sample:
-            df = df.sample(min(limit, len(df)))
+            rows = np.random.choice(rows, min(limit, len(rows)), replace=False)
         else:
-            df = df.head(limit)
+            rows = rows[:limit]
     
-    return df.reset_index(drop=True)
+    return _store.view(rows).reset_index(drop=True)
 
 TOOL_FUNC = {
     "data_slicer": (
+        # the tool only ever returns 10 rows, so never materialize more than that; without a
+        # limit random_sample does not apply, so those are the first 10 rows
         lambda filter=None, group_by=None, sort_by=None, limit=None, random_sample=False: _df_to_json(
-            data_slicer(filter, group_by, sort_by, limit, random_sample)
+            data_slicer(filter, group_by, sort_by, 10, False)
+            if limit is None
+            else data_slicer(filter, group_by, sort_by, min(limit, 10), random_sample)
         ),
         {
             "name": "data_slicer",
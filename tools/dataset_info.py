@@ -1,7 +1,12 @@
 from typing import Dict, Any
-import pandas as pd
+from functools import lru_cache
+import copy
 
-from bitext.datastore import _store, _CATEGORY_COL, _INTENT_COL, _FLAGS_COL, _INSTRUCTION_COL, _RESPONSE_COL
+from bitext import storage
+from bitext.datastore import _store, _CACHE_DIR, _CATEGORY_COL, _INTENT_COL, _FLAGS_COL, _INSTRUCTION_COL, _RESPONSE_COL
+
+_PROFILE_VERSION = 1
+_PROFILE_FILE = _CACHE_DIR / f"profile_v{_PROFILE_VERSION}.json"
 
 def dataset_info() -> Dict[str, Any]:
     """
@@ -29,13 +34,34 @@ def dataset_info() -> Dict[str, Any]:
         - flags: Statistics about flags
             - total: Number of unique flags
             - distribution: Full distribution of flags
+
+    The profile is computed once per dataset fingerprint and persisted in the
+    cache directory, so repeated calls (every system prompt) are a dict copy.
     """
+    return copy.deepcopy(_load_or_build_profile())
+
+@lru_cache(maxsize=1)
+def _load_or_build_profile() -> Dict[str, Any]:
+    cached = storage.read_json(_PROFILE_FILE)
+    if cached is not None and cached["fingerprint"] == _store.fingerprint:
+        return cached["profile"]
+
+    with storage.build_lock(_PROFILE_FILE):
+        cached = storage.read_json(_PROFILE_FILE)
+        if cached is not None and cached["fingerprint"] == _store.fingerprint:
+            return cached["profile"]
+
+        profile = _build_profile()
+        storage.write_json(_PROFILE_FILE, {"fingerprint": _store.fingerprint, "profile": profile})
+    return profile
+
+def _build_profile() -> Dict[str, Any]:
     category_dist = _store.df[_CATEGORY_COL].value_counts()
     intent_dist = _store.df[_INTENT_COL].value_counts()
     flag_dist = _store.df[_FLAGS_COL].value_counts()
     
-    instruction_lengths = _store.df[_INSTRUCTION_COL].str.len()
-    response_lengths = _store.df[_RESPONSE_COL].str.len()
+    instruction_lengths = _store.features[f"{_INSTRUCTION_COL}_length"]
+    response_lengths = _store.features[f"{_RESPONSE_COL}_length"]
     
     return {
         "dataset": {
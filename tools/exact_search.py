@@ -1,11 +1,25 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
+from functools import reduce
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 
-from bitext.datastore import _store
+from bitext.datastore import _store, _TEXT_COLS
+
+# candidates are verified in batches so the scan stops once k matches are confirmed
+_VERIFY_BATCH = 256
+
+def _arrow_text(col: str) -> pa.Array:
+    text = pa.array(_store.features[f"{col}_norm"].array)
+    return text.combine_chunks() if isinstance(text, pa.ChunkedArray) else text
+
+_norm = {col: _arrow_text(col) for col in _TEXT_COLS}
 
 def exact_search(text: str, column: str | None = None, k: int = 5) -> pd.DataFrame:
     """
     Search for exact text matches in specified column(s). Case-insensitive matching.
+    The text is matched literally, never as a regular expression.
     
     Args:
         text: Text to search for
@@ -13,18 +27,48 @@ def exact_search(text: str, column: str | None = None, k: int = 5) -> pd.DataFra
         k: Maximum number of results to return
         
     Returns:
-        pd.DataFrame: DataFrame containing the matching entries
+        pd.DataFrame: DataFrame containing the first k matching entries, in dataset order
     """
     if column is None:
         # Search in both instruction and response columns
-        mask = _store.df['instruction'].str.contains(text, case=False) | _store.df['response'].str.contains(text, case=False)
+        columns = _TEXT_COLS
     elif column not in _store.df.columns:
         raise ValueError(f"Column '{column}' not found in dataset. Available columns: {_store.df.columns.tolist()}")
     else:
         # Search in specified column only
-        mask = _store.df[column].str.contains(text, case=False)
+        columns = [column]
+    
+    if all(col in _TEXT_COLS for col in columns):
+        rows = _find_text(text, columns, k)
+    else:
+        mask = _store.df[column].astype(str).str.contains(text, case=False, regex=False)
+        rows = np.flatnonzero(mask.to_numpy(dtype=bool, na_value=False))[:k]
         
-    return _store.df[mask].head(k).reset_index(drop=True)
+    return _store.view(rows).reset_index(drop=True)
+
+def _find_text(text: str, columns: List[str], k: int) -> np.ndarray:
+    """First k rows whose lowercased text columns contain ``text``, narrowed by the trigram indexes."""
+    # lowercase exactly like the indexed columns were
+    needle = pc.utf8_lower(pa.scalar(text)).as_py()
+    
+    candidates = [_store.trigrams[col].candidates(needle.encode()) for col in columns]
+    if any(c is None for c in candidates):
+        # too short to narrow: scan every row, still stopping at k
+        candidates = np.arange(len(_store.df))
+    else:
+        candidates = reduce(np.union1d, candidates)
+    
+    matches = []
+    for start in range(0, len(candidates), _VERIFY_BATCH):
+        batch = candidates[start:start + _VERIFY_BATCH]
+        hit = np.zeros(len(batch), dtype=bool)
+        for col in columns:
+            found = pc.match_substring(_norm[col].take(pa.array(batch)), needle)
+            hit |= pc.fill_null(found, False).to_numpy(zero_copy_only=False)
+        matches.extend(batch[hit])
+        if len(matches) >= k:
+            break
+    return np.array(matches[:k], dtype=np.int64)
 
 def _df_to_json(df, limit=10):
     return df.head(limit).to_dict(orient="records")
@@ -35,7 +79,7 @@ TOOL_FUNC = {
         {
             "name": "exact_search",
             "description": (
-                "Search for exact text matches in specified column(s). Case-insensitive matching. "
+                "Search for exact text matches in specified column(s). Case-insensitive, literal matching (not a regular expression). "
                 "Use this tool when you need to find entries containing specific text or phrases. "
                 "Unlike semantic search, this looks for literal text matches rather than conceptual similarity. "
                 "You can search in any column of the dataset, or omit the column parameter to search in both 'instruction' and 'response' columns. "
@@ -1,60 +1,121 @@
-from typing import Dict, Any
+import argparse
+import hashlib
+import json
+import os
+from typing import Dict, Any, List
 import numpy as np
-from sklearn.cluster import KMeans
 import pandas as pd
 
-from bitext.datastore import _store
+from bitext.datastore import _store, _CACHE_DIR
+from bitext.result_cache import ResultCache
+from bitext.clustering import cluster
 
 _df = _store.df
 _model = _store.model
+_field_embeddings = _store.field_embeddings
+
+# "auto" (k-means, mini-batch above ~10k rows), "kmeans", "minibatch" or "tree"
+_CLUSTER_BACKEND = os.environ.get("BITEXT_CLUSTER_BACKEND", "auto")
+_CLUSTER_MAX_ITER = int(os.environ.get("BITEXT_CLUSTER_MAX_ITER", "300"))
+_CLUSTER_TIME_BUDGET = float(os.environ["BITEXT_CLUSTER_TIME_BUDGET"]) if "BITEXT_CLUSTER_TIME_BUDGET" in os.environ else None
+_TREE_DIR = _CACHE_DIR / "cluster_trees_v1"
+
+_RESULT_CACHE_VERSION = 1
+_result_cache = ResultCache(
+    _CACHE_DIR / f"common_questions_v{_RESULT_CACHE_VERSION}",
+    max_bytes=int(os.environ.get("BITEXT_RESULT_CACHE_MB", "64")) * 2**20,
+)
 
 def find_common_questions(filter: Dict[str, Any] | None = None, text_field: str = "instruction", n: int = 10) -> Dict[str, Any]:
-        """
-        Analyzes customer messages to find common types of requests and questions.
-        Groups similar customer inquiries together, showing you:
-        - The most common ways customers ask for help
-        - How many customers ask similar questions
-        - Real examples of how customers phrase their requests
+    """
+    Analyzes customer messages to find common types of requests and questions.
+    Groups similar customer inquiries together, showing you:
+    - The most common ways customers ask for help
+    - How many customers ask similar questions
+    - Real examples of how customers phrase their requests
 
-        This helps understand what customers need help with most often and how they typically ask for it.
-        
-        Args:
-            filter: Optional dictionary of column-value pairs to filter the data (e.g., {"category": "ACCOUNT", "intent": "cancel_order"})
-            text_field: Which part to analyze - customer questions ('instruction') or agent responses ('response')
-            n: How many common patterns to show
-        
-        Returns:
-            Dict containing:
-            - patterns: List of common customer requests found, each with:
-                - pattern: The most typical way this request is phrased
-                - count: How many customers asked similar questions
-                - examples: Real examples of how customers asked this question
-            - total_entries: Total number of customer messages analyzed
-            - available_fields: List of fields that were available for analysis
-        """
-        df = _df.copy()
-        
-        # Apply filters if specified
-        if filter is not None:
-            # Validate filter keys
-            invalid_keys = [key for key in filter.keys() if key not in df.columns]
-            if invalid_keys:
-                raise ValueError(f"Invalid filter keys: {invalid_keys}. Available columns: {df.columns.tolist()}")
-            
-            # Apply each filter condition
-            for col, val in filter.items():
-                df = df[df[col] == val]
+    This helps understand what customers need help with most often and how they typically ask for it.
+    
+    Args:
+        filter: Optional dictionary of column-value pairs to filter the data (e.g., {"category": "ACCOUNT", "intent": "cancel_order"})
+        text_field: Which part to analyze - customer questions ('instruction') or agent responses ('response')
+        n: How many common patterns to show
+    
+    Returns:
+        Dict containing:
+        - patterns: List of common customer requests found, each with:
+            - pattern: The most typical way this request is phrased
+            - count: How many customers asked similar questions
+            - examples: Real examples of how customers asked this question
+        - total_entries: Total number of customer messages analyzed
+        - available_fields: List of fields that were available for analysis
+    """
+    # Clustering is deterministic for a given slice, so results are cached on
+    # disk per dataset; equivalent filters share one entry
+    key = {
+        "version": _RESULT_CACHE_VERSION,
+        "dataset_fingerprint": _store.fingerprint,
+        "filter": _canonical_filter(filter),
+        "text_field": text_field,
+        "n": n,
+        "clustering": {
+            "backend": _CLUSTER_BACKEND,
+            "max_iter": _CLUSTER_MAX_ITER,
+        "time_budget": _CLUSTER_TIME_BUDGET,
+            "time_budget": _CLUSTER_TIME_BUDGET,
+        },
+    }
+    result = _result_cache.get(key)
+    if result is None:
+        result = _find_common_questions(filter, text_field, n)
+        _result_cache.put(key, result)
+    return result
+
+def _canonical_filter(filter: Dict[str, Any] | None) -> Dict[str, List[Any]] | None:
+    """Normalize a filter so that filters selecting the same rows compare equal."""
+    if not filter:
+        return None
+    return {
+        col: sorted(set(val if isinstance(val, list) else [val]), key=repr)
+        for col, val in sorted(filter.items())
+    }
+
+def _tree_source(filter: Dict[str, Any] | None, text_field: str) -> Dict[str, Any]:
+    """Identifies the slice a cluster tree is built from; the tree is valid for any n."""
+    return {
+        "dataset_fingerprint": _store.fingerprint,
+        "filter": _canonical_filter(filter),
+        "text_field": text_field,
+        "max_iter": _CLUSTER_MAX_ITER,
+        "time_budget": _CLUSTER_TIME_BUDGET,
+    }
+
+def _tree_digest(filter: Dict[str, Any] | None, text_field: str) -> str:
+    return hashlib.sha256(json.dumps(_tree_source(filter, text_field), sort_keys=True, default=str).encode()).hexdigest()
+
+def prewarm(text_field: str = "instruction", n: int = 10) -> None:
+    """Fill the result cache for the whole dataset and for every category and intent."""
+    filters = [None]
+    filters += [{"category": category} for category in _store.get_categories()]
+    filters += [{"intent": intent} for intent in _store.get_intents()]
+    for filter in filters:
+        find_common_questions(filter, text_field, n)
+
+def _find_common_questions(filter: Dict[str, Any] | None, text_field: str, n: int) -> Dict[str, Any]:
+        """Cluster the texts of the filtered slice; see ``find_common_questions``."""
+        # Work on row positions into the shared frame instead of copying it
+        rows = _store.filter_rows(filter) if filter is not None else np.arange(len(_df))
         
         # Find suitable text columns if the specified one doesn't exist
-        available_fields = df.columns.tolist()
+        available_fields = _df.columns.tolist()
         if text_field not in available_fields:
             # Look for columns that might contain text (string type)
-            text_columns = [col for col in available_fields if df[col].dtype == 'object']
+            text_columns = [col for col in available_fields if pd.api.types.is_string_dtype(_df[col].dtype)]
             if text_columns:
                 text_field = text_columns[0]  # Use the first text column found
         
         # Get text to analyze
-        texts = df[text_field].astype(str)
+        texts = _store.view(rows, [text_field])[text_field].astype(str)
         
         # If we have no texts, return empty result
         if len(texts) == 0:
@@ -64,8 +125,12 @@ def find_common_questions(filter: Dict[str, Any] | None = None, text_field: str
                 "available_fields": available_fields
             }
         
-        # Use the existing sentence transformer model to get embeddings
-        embeddings = _model.encode(texts.tolist(), show_progress_bar=False)
+        # Slice the precomputed embeddings by row position; only fields without
+        # a persisted matrix still go through the sentence transformer
+        if text_field in _field_embeddings:
+            embeddings = np.asarray(_field_embeddings[text_field][rows], dtype=np.float32)
+        else:
+            embeddings = _model.encode(texts.tolist(), show_progress_bar=False).astype(np.float32)
         
         # Calculate number of clusters (can't be more than number of texts)
         n_clusters = min(n, len(texts))
@@ -83,23 +148,32 @@ def find_common_questions(filter: Dict[str, Any] | None = None, text_field: str
             }
         
         # Use clustering to find patterns
-        kmeans = KMeans(n_clusters=n_clusters, random_state=0, n_init="auto")
-        clusters = kmeans.fit_predict(embeddings)
+        clusters, centers = cluster(
+            embeddings,
+            n_clusters,
+            backend=_CLUSTER_BACKEND,
+            max_iter=_CLUSTER_MAX_ITER,
+            time_budget=_CLUSTER_TIME_BUDGET,
+            tree_file=_TREE_DIR / f"{_tree_digest(filter, text_field)}.npz",
+            tree_source=_tree_source(filter, text_field),
+        )
         
-        # Analyze each cluster
+        # Analyze each cluster; one sort groups the members of every cluster
+        order = np.argsort(clusters, kind="stable")
+        bounds = np.searchsorted(clusters[order], np.arange(len(centers) + 1))
         patterns = []
-        for i in range(kmeans.n_clusters):
-            cluster_texts = texts[clusters == i]
+        for i in range(len(centers)):
+            members = order[bounds[i]:bounds[i + 1]]
+            if len(members) == 0:
+                continue
             # Get most representative example (closest to cluster center)
-            center = kmeans.cluster_centers_[i]
-            distances = np.linalg.norm(embeddings[clusters == i] - center, axis=1)
-            example_idx = np.argmin(distances)
-            example = cluster_texts.iloc[example_idx]
+            distances = np.linalg.norm(embeddings[members] - centers[i], axis=1)
+            example = texts.iloc[members[np.argmin(distances)]]
             
             patterns.append({
                 "pattern": example,
-                "count": len(cluster_texts),
-                "examples": cluster_texts.sample(min(3, len(cluster_texts))).tolist()
+                "count": len(members),
+                "examples": texts.iloc[np.random.choice(members, min(3, len(members)), replace=False)].tolist()
             })
         
         # Sort patterns by count
@@ -107,7 +181,7 @@ def find_common_questions(filter: Dict[str, Any] | None = None, text_field: str
         
         return {
             "patterns": patterns[:n],
-            "total_entries": len(df),
+            "total_entries": len(rows),
             "available_fields": available_fields
         }
 
@@ -120,8 +194,7 @@ TOOL_FUNC = {
                 "Analyzes customer messages to find common patterns and group similar inquiries together. "
                 "This tool helps understand how customers typically phrase their requests and what they need help with most often. "
                 "It uses machine learning to identify patterns in customer messages and provides examples of how customers ask similar questions. "
-                "Use this when you want to understand common customer needs or improve response templates. "
-                "Note: This tool may take a few minutes to run as it performs complex clustering analysis on the data."
+                "Use this when you want to understand common customer needs or improve response templates."
             ),
             "parameters": {
                 "type": "object",
@@ -144,4 +217,11 @@ TOOL_FUNC = {
             }
         }
     )
-}
\ No newline at end of file
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-compute find_common_questions for every category and intent.")
+    parser.add_argument("--text-field", default="instruction")
+    parser.add_argument("--n", type=int, default=10)
+    args = parser.parse_args()
+    prewarm(args.text_field, args.n)
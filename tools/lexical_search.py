@@ -0,0 +1,116 @@
+from typing import Dict, Any
+import numpy as np
+import pandas as pd
+
+from bitext.datastore import _store, _COMBINED_FIELD
+
+# standard reciprocal rank fusion constant; damps the advantage of the very top ranks
+_RRF_K = 60
+# each ranker contributes this many candidates (at least k) to the fusion
+_HYBRID_DEPTH = 50
+
+def lexical_search(
+    text: str,
+    k: int = 5,
+    field: str | None = None,
+    mode: str = "bm25",
+    filter: Dict[str, Any] | None = None
+) -> pd.DataFrame:
+    """
+    Perform keyword search on the dataset with BM25 ranking, optionally fused with semantic search.
+
+    Args:
+        text: The query text to search for
+        k: Number of best results to return
+        field: Search only 'instruction' or 'response', or omit to search both combined
+        mode: 'bm25' for keyword ranking only, or 'hybrid' to fuse the BM25 and
+              semantic rankings with reciprocal rank fusion
+        filter: Optional dictionary of column-value pairs restricting which rows are searched.
+               Values can be single values or lists for multiple matches.
+               Example: {"category": "REFUND"} or {"intent": ["cancel_order", "track_order"]}
+
+    Returns:
+        pd.DataFrame: DataFrame containing up to k best matching entries, best match first,
+        with their BM25 or fused score in a 'score' column
+    """
+    field = field or _COMBINED_FIELD
+    if field not in _store.lexical_indexes:
+        raise ValueError(f"Invalid field: {field}. Available fields: {list(_store.lexical_indexes)}")
+    if mode not in ("bm25", "hybrid"):
+        raise ValueError(f"Invalid mode: {mode}. Use 'bm25' or 'hybrid'")
+
+    rows = _store.filter_rows(filter) if filter else None
+
+    if mode == "bm25":
+        idx, scores = _store.lexical_indexes[field].search(text, k, rows=rows)
+    else:
+        idx, scores = _hybrid_search(text, k, field, rows)
+
+    results = _store.view(idx).reset_index(drop=True)
+    results["score"] = scores.astype(float)
+    return results
+
+def _hybrid_search(text: str, k: int, field: str, rows: np.ndarray | None):
+    depth = max(k, _HYBRID_DEPTH)
+    lexical_idx, _ = _store.lexical_indexes[field].search(text, depth, rows=rows)
+    semantic_idx, _ = _store.search(_store.model.encode(text), depth, field=field, rows=rows)
+
+    # a row's fused score is the sum of 1 / (_RRF_K + rank) over the rankings it appears in
+    candidates = np.concatenate([lexical_idx, semantic_idx])
+    ranks = np.concatenate([np.arange(len(lexical_idx)), np.arange(len(semantic_idx))])
+    idx, inverse = np.unique(candidates, return_inverse=True)
+    scores = np.bincount(inverse, weights=1.0 / (_RRF_K + 1 + ranks), minlength=len(idx))
+
+    top = np.argsort(-scores, kind="stable")[:k]
+    return idx[top], scores[top]
+
+def _df_to_json(df, limit=10):
+    return df.head(limit).to_dict(orient="records")
+
+TOOL_FUNC = {
+    "lexical_search": (
+        lambda text, k=5, field=None, mode="bm25", filter=None: _df_to_json(lexical_search(text, k, field, mode, filter)),
+        {
+            "name": "lexical_search",
+            "description": (
+                "Perform keyword search on the dataset ranked with BM25, "
+                "so entries sharing more (and rarer) query words rank higher, each with a 'score'. "
+                "Unlike exact_search the words don't need to appear as one literal phrase. "
+                "Set mode to 'hybrid' to fuse the keyword ranking with the semantic_search ranking "
+                "in a single call, which finds entries that match either the wording or the meaning "
+                "of the query; prefer it over calling exact_search and semantic_search separately. "
+                "Can be restricted to a slice of the data with the same filter as data_slicer."
+            ),
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "text": {
+                        "type": "string",
+                        "description": "The query text; its words are matched individually"
+                    },
+                    "k": {
+                        "type": "integer",
+                        "description": "Number of best results to return",
+                        "default": 5
+                    },
+                    "field": {
+                        "type": "string",
+                        "description": "Search only customer questions ('instruction') or agent responses ('response'). Omit to search both",
+                        "enum": ["instruction", "response"]
+                    },
+                    "mode": {
+                        "type": "string",
+                        "description": "'bm25' for keyword ranking only, 'hybrid' to fuse keyword and semantic rankings",
+                        "enum": ["bm25", "hybrid"],
+                        "default": "bm25"
+                    },
+                    "filter": {
+                        "type": "object",
+                        "description": "Optional dictionary of column-value pairs restricting the search to matching rows. Values can be single values or lists for multiple matches. Example: {'category': 'REFUND'} or {'intent': ['cancel_order', 'track_order']}"
+                    }
+                },
+                "required": ["text"]
+            }
+        }
+    )
+}
@@ -1,36 +1,58 @@
 from typing import Dict, Any
 import pandas as pd
 
-from bitext.datastore import _store
+from bitext.datastore import _store, _COMBINED_FIELD
 
-def semantic_search(text: str, k: int = 5) -> pd.DataFrame:
+def semantic_search(
+    text: str,
+    k: int = 5,
+    field: str | None = None,
+    filter: Dict[str, Any] | None = None
+) -> pd.DataFrame:
     """
     Perform semantic search on the dataset using sentence embeddings.
     
     Args:
         text: The query text to search for
         k: Number of most similar results to return
+        field: Compare against 'instruction' or 'response' embeddings only,
+               or omit to compare against both combined
+        filter: Optional dictionary of column-value pairs restricting which rows are searched.
+               Values can be single values or lists for multiple matches.
+               Example: {"category": "REFUND"} or {"intent": ["cancel_order", "track_order"]}
         
     Returns:
-        pd.DataFrame: DataFrame containing the k most semantically similar entries
+        pd.DataFrame: DataFrame containing the k most semantically similar entries,
+        best match first, with their cosine similarity in a 'score' column
     """
-    q = _store.model.encode([text])
-    idx = _store.nn.kneighbors(q, n_neighbors=k, return_distance=False)[0]
-    return _store.df.iloc[idx].reset_index(drop=True)
+    field = field or _COMBINED_FIELD
+    if field not in _store.indexes:
+        raise ValueError(f"Invalid field: {field}. Available fields: {list(_store.indexes)}")
+
+    rows = _store.filter_rows(filter) if filter else None
+
+    q = _store.model.encode(text)
+    idx, scores = _store.search(q, k, field=field, rows=rows)
+    results = _store.df.iloc[idx].reset_index(drop=True)
+    results["score"] = scores.astype(float)
+    return results
 
 def _df_to_json(df, limit=10):
     return df.head(limit).to_dict(orient="records")
 
 TOOL_FUNC = {
     "semantic_search": (
-        lambda text, k=5: _df_to_json(semantic_search(text, k)),
+        lambda text, k=5, field=None, filter=None: _df_to_json(semantic_search(text, k, field, filter)),
         {
             "name": "semantic_search",
             "description": (
                 "Perform semantic search on the dataset using sentence embeddings. "
-                "This tool finds the most semantically similar entries to the given query text. "
+                "This tool finds the most semantically similar entries to the given query text, "
+                "each with a cosine similarity 'score' (higher is more similar). "
                 "Use this when you need to find entries that are conceptually similar to a given text, "
                 "even if they don't contain the exact same words. "
+                "Can be restricted to a slice of the data with the same filter as data_slicer, "
+                "e.g. similar questions within the REFUND category. "
                 "Example use cases: finding similar customer questions, related support requests, "
                 "or semantically similar responses."
             ),
@@ -45,6 +67,15 @@ TOOL_FUNC = {
                         "type": "integer",
                         "description": "Number of most similar results to return",
                         "default": 5
+                    },
+                    "field": {
+                        "type": "string",
+                        "description": "Compare only against customer questions ('instruction') or agent responses ('response'). Omit to compare against both",
+                        "enum": ["instruction", "response"]
+                    },
+                    "filter": {
+                        "type": "object",
+                        "description": "Optional dictionary of column-value pairs restricting the search to matching rows. Values can be single values or lists for multiple matches. Example: {'category': 'REFUND'} or {'intent': ['cancel_order', 'track_order']}"
                     }
                 },
                 "required": ["text"]
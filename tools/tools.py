@@ -3,6 +3,7 @@ from tools import data_slicer
 from tools import aggregator
 from tools import exact_search
 from tools import semantic_search
+from tools import lexical_search
 from tools import find_common_questions
 from tools import calculator
 
@@ -13,9 +14,50 @@ _TOOL_FUNCS.update(data_slicer.TOOL_FUNC)
 _TOOL_FUNCS.update(aggregator.TOOL_FUNC)
 _TOOL_FUNCS.update(exact_search.TOOL_FUNC)
 _TOOL_FUNCS.update(semantic_search.TOOL_FUNC)
+_TOOL_FUNCS.update(lexical_search.TOOL_FUNC)
 _TOOL_FUNCS.update(find_common_questions.TOOL_FUNC)
 _TOOL_FUNCS.update(calculator.TOOL_FUNC)
 
 TOOLS_SCHEMA = [
     {"type": "function", "function": meta} for _, meta in _TOOL_FUNCS.values()
-]
\ No newline at end of file
+]
+
+# Tools whose result is fully determined by their arguments and the dataset,
+# so repeated calls may be answered from the tool-result cache. Tools missing
+# here (calculator) are never cached.
+_CACHEABLE = {
+    "dataset_info": lambda args: True,
+    "data_slicer": lambda args: not args.get("random_sample"),
+    "aggregator": lambda args: True,
+    "exact_search": lambda args: True,
+    "semantic_search": lambda args: True,
+    "lexical_search": lambda args: True,
+    # examples are sampled, but the result is already persisted per argument set
+    "find_common_questions": lambda args: True,
+}
+
+
+def is_cacheable(name: str, args: dict) -> bool:
+    policy = _CACHEABLE.get(name)
+    return policy is not None and policy(args)
+
+
+# Calls that use a CPU-bound resource are limited to that many at a time when
+# a turn runs several tools in parallel; the others are unlimited. The policy
+# sees the arguments, as only some calls of a tool actually use the resource.
+_CONCURRENCY_LIMITS = {"encoder": 1}
+_TOOL_RESOURCES = {
+    "semantic_search": lambda args: "encoder",
+    # plain BM25 never runs the sentence transformer
+    "lexical_search": lambda args: "encoder" if args.get("mode") == "hybrid" else None,
+    # persisted fields are sliced from the stored embeddings instead of encoded
+    "find_common_questions": lambda args: (
+        None if args.get("text_field", "instruction") in find_common_questions._field_embeddings else "encoder"
+    ),
+}
+
+
+def tool_resource(name: str, args: dict) -> str | None:
+    """The limited resource a call needs while it runs, if any."""
+    policy = _TOOL_RESOURCES.get(name)
+    return policy(args) if policy is not None else None